@@ -11,19 +11,23 @@
 """
 
 import os
+import sys
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
 import yaml
 
 from utils.db import get_connection
-from calc_market_price import calc_market_price_with_fallback
 
 
 # 設定ファイルのパス
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 ADJUSTMENTS_FILE = CONFIG_DIR / "adjustments.yml"
 
+# LibYAML（C拡張）付きでビルドされていれば高速なローダーを使用する
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_adjustments() -> dict:
     """補正係数設定を読み込み"""
@@ -31,7 +35,7 @@ def load_adjustments() -> dict:
         return {"walk_minutes": [], "floor": [], "direction": [], "area": []}
 
     with open(ADJUSTMENTS_FILE, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {"walk_minutes": [], "floor": [], "direction": [], "area": []}
+        return yaml.load(f, Loader=_YAML_LOADER) or {"walk_minutes": [], "floor": [], "direction": [], "area": []}
 
 
 def get_walk_factor(minutes: Optional[int], adjustments: dict) -> float:
@@ -97,6 +101,15 @@ def get_direction_factor(direction: Optional[str], adjustments: dict) -> float:
     return 1.0
 
 
+def build_direction_factor_table(cursor, adjustments: dict) -> Dict[int, float]:
+    """direction_id → 向き補正係数 の対応表を作成（DBに現れる全ての向きについて設定ファイルから引く）"""
+    cursor.execute("SELECT id, name FROM directions")
+    return {
+        direction_id: get_direction_factor(name, adjustments)
+        for direction_id, name in cursor.fetchall()
+    }
+
+
 def get_area_factor(area: Optional[float], adjustments: dict) -> float:
     """
     面積から補正係数を取得
@@ -171,6 +184,45 @@ def calc_deal_score(asking_price: int, adjusted_market_price: int) -> float:
     return (adjusted_market_price - asking_price) / adjusted_market_price * 100
 
 
+def check_market_prices() -> Optional[str]:
+    """
+    market_prices がスコア計算に使える状態か確認する
+
+    Returns:
+        問題がある場合はその内容（問題なければNone）
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(market_prices)")
+        if "level" not in {row[1] for row in cursor.fetchall()}:
+            return "market_prices が旧形式です（level列なし）。calc_market_price.py を再実行してください"
+
+        cursor.execute("SELECT COUNT(*), COUNT(level) FROM market_prices")
+        total, with_level = cursor.fetchone()
+        if total == 0:
+            return "market_prices が空です。calc_market_price.py を実行してください"
+        if with_level == 0:
+            return "market_prices にフォールバックレベル別の相場がありません（level が全てNULL）。calc_market_price.py を再実行してください"
+
+    return None
+
+
+def check_direction_id() -> Optional[str]:
+    """
+    listings.direction_id（migrate_price_tracking.py で作成）が使えるか確認する
+
+    Returns:
+        問題がある場合はその内容（問題なければNone）
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'directions'")
+        if cursor.fetchone() is None:
+            return "directions テーブルがありません。migrate_price_tracking.py を実行してください"
+
+    return None
+
+
 def update_listing_scores() -> Tuple[int, int, int]:
     """
     全物件のスコアを更新
@@ -184,14 +236,59 @@ def update_listing_scores() -> Tuple[int, int, int]:
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        # 全アクティブ物件を取得（新規カラムも含む）
+        direction_factors = build_direction_factor_table(cursor, adjustments)
+
+        # 全アクティブ物件を取得し、market_pricesの各フォールバックレベルをJOIN
+        # 築年数帯・面積帯の境界は get_age_bracket / get_area_bracket と同じ
         cursor.execute("""
-            SELECT id, ward_name, station_name, asking_price, area, building_year,
-                   minutes_to_station, floor, direction,
-                   total_units, total_floors, pet_allowed, good_view, good_sunlight
-            FROM listings
-            WHERE status = 'active'
-        """)
+            WITH l AS (
+                SELECT id, ward_name, station_name, asking_price, area, building_year,
+                       minutes_to_station, floor, direction_id,
+                       total_units, total_floors, pet_allowed, good_view, good_sunlight,
+                       CASE
+                           WHEN building_year IS NULL THEN NULL
+                           WHEN :year - building_year <= 10 THEN '0-10'
+                           WHEN :year - building_year <= 20 THEN '11-20'
+                           WHEN :year - building_year <= 30 THEN '21-30'
+                           ELSE '31+'
+                       END AS age_bracket,
+                       CASE
+                           WHEN area IS NULL OR area < 40 THEN NULL
+                           WHEN area <= 50 THEN '40-50'
+                           WHEN area <= 60 THEN '51-60'
+                           WHEN area <= 70 THEN '61-70'
+                           WHEN area <= 80 THEN '71-80'
+                           ELSE '81+'
+                       END AS area_bracket
+                FROM listings
+                WHERE status = 'active'
+            )
+            SELECT l.id, l.ward_name, l.station_name, l.asking_price, l.area, l.building_year,
+                   l.minutes_to_station, l.floor, l.direction_id,
+                   l.total_units, l.total_floors, l.pet_allowed, l.good_view, l.good_sunlight,
+                   COALESCE(mp1.median_unit_price, mp2.median_unit_price,
+                            mp3.median_unit_price, mp4.median_unit_price) AS median_unit_price,
+                   CASE
+                       WHEN mp1.median_unit_price IS NOT NULL THEN 1
+                       WHEN mp2.median_unit_price IS NOT NULL THEN 2
+                       WHEN mp3.median_unit_price IS NOT NULL THEN 3
+                       WHEN mp4.median_unit_price IS NOT NULL THEN 4
+                       ELSE 5
+                   END AS fallback_level
+            FROM l
+            LEFT JOIN market_prices mp1
+              ON mp1.level = 1 AND mp1.ward_name = l.ward_name AND mp1.station_name = l.station_name
+             AND mp1.age_bracket = l.age_bracket AND mp1.area_bracket = l.area_bracket
+            LEFT JOIN market_prices mp2
+              ON mp2.level = 2 AND mp2.ward_name = l.ward_name AND mp2.station_name = l.station_name
+             AND mp2.age_bracket = l.age_bracket
+            LEFT JOIN market_prices mp3
+              ON mp3.level = 3 AND mp3.ward_name = l.ward_name
+             AND mp3.age_bracket = l.age_bracket AND mp3.area_bracket = l.area_bracket
+            LEFT JOIN market_prices mp4
+              ON mp4.level = 4 AND mp4.ward_name = l.ward_name
+             AND mp4.age_bracket = l.age_bracket
+        """, {"year": datetime.now().year})
         listings = cursor.fetchall()
 
         updated = 0
@@ -207,31 +304,31 @@ def update_listing_scores() -> Tuple[int, int, int]:
             building_year = row[5]
             minutes_to_station = row[6]
             floor = row[7]
-            direction = row[8]
+            direction_id = row[8]
             total_units = row[9]
             total_floors = row[10]
             pet_allowed = bool(row[11]) if row[11] is not None else None
             good_view = bool(row[12]) if row[12] is not None else None
             good_sunlight = bool(row[13]) if row[13] is not None else None
+            median_unit_price = row[14]
+            fallback_level = row[15]
 
             # 必須データのチェック
             if not asking_price or not area or not building_year:
                 skipped += 1
                 continue
 
-            # フォールバック付きで相場価格を取得
-            market_price, sample_count, fallback_level = calc_market_price_with_fallback(
-                ward_name, station_name, building_year, area
-            )
-
-            if not market_price or fallback_level == 5:
+            # 該当する相場がない（算出不可）
+            if not median_unit_price or fallback_level == 5:
                 skipped += 1
                 continue
 
+            market_price = int(median_unit_price * area)
+
             # 補正係数を取得（基本4項目）
             walk_factor = get_walk_factor(minutes_to_station, adjustments)
             floor_factor = get_floor_factor(floor, adjustments)
-            direction_factor = get_direction_factor(direction, adjustments)
+            direction_factor = direction_factors.get(direction_id, 1.0)
             area_factor = get_area_factor(area, adjustments)
 
             # 補正係数を取得（詳細ページ由来5項目）
@@ -308,15 +405,8 @@ def get_listings_by_score(limit: int = 50) -> List[dict]:
             LIMIT ?
         """, (limit,))
 
-        columns = [
-            'id', 'property_name', 'ward_name', 'station_name',
-            'asking_price', 'market_price', 'adjusted_market_price', 'deal_score',
-            'area', 'floor_plan', 'building_year', 'suumo_url',
-            'minutes_to_station', 'floor', 'direction',
-            'walk_factor', 'floor_factor', 'direction_factor', 'area_factor',
-            'fallback_level'
-        ]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        # get_connection の row_factory (sqlite3.Row) から列名付きで変換
+        return [dict(row) for row in cursor.fetchall()]
 
 
 def print_ranking(listings: List[dict]):
@@ -401,6 +491,12 @@ def main():
     print(f"  陽当り: {len(adjustments.get('good_sunlight', []))}種類")
     print()
 
+    # 相場（calc_market_price.py）と向きID（migrate_price_tracking.py）が用意されている前提
+    problem = check_market_prices() or check_direction_id()
+    if problem:
+        print(f"エラー: {problem}")
+        sys.exit(1)
+
     updated, skipped, errors = update_listing_scores()
 
     print(f"更新: {updated}件")
@@ -5,7 +5,7 @@
 ロジック:
 1. 駅×築年数帯×面積帯で㎡単価の中央値を算出
 2. フォールバック戦略で段階的に条件を緩和
-3. 結果をmarket_pricesテーブルに保存
+3. 全フォールバックレベルの結果をmarket_pricesテーブルに保存（level列）
 
 フォールバック優先度:
 1. 駅×築年数×面積 (min_samples=20)
@@ -15,12 +15,36 @@
 5. 算出不可
 """
 
-import statistics
+from collections import defaultdict
 from datetime import datetime
 from typing import Optional, List, Tuple
 
+import numpy as np
+
 from utils.db import get_connection
-from utils.config import get_market_config
+
+# フォールバックレベルごとの最小サンプル数
+# 築年数帯・面積帯とあわせて calc_deal_score.py のSQL（帯の判定）と対応しているため、設定ファイルでは変更しない
+FALLBACK_MIN_SAMPLES = {1: 20, 2: 15, 3: 10, 4: 5}
+
+AGE_BRACKETS = ["0-10", "11-20", "21-30", "31+"]
+AREA_BRACKETS = ["40-50", "51-60", "61-70", "71-80", "81+"]
+
+
+def calc_median(prices: List[int]) -> int:
+    """
+    ㎡単価の中央値を算出（全ソートせず np.partition で O(n) 選択）
+
+    偶数件の場合は中央2値の平均を切り捨て（statistics.median と同じ結果）
+    """
+    arr = np.asarray(prices, dtype=np.int64)
+    n = len(arr)
+    k = n // 2
+    if n % 2:
+        return int(np.partition(arr, k)[k])
+
+    part = np.partition(arr, [k - 1, k])
+    return int((int(part[k - 1]) + int(part[k])) / 2)
 
 
 def get_age_bracket(building_year: Optional[int]) -> Optional[str]:
@@ -174,27 +198,27 @@ def calc_market_price_with_fallback(
         if station_name and area_bracket:
             prices = query_unit_prices(cursor, ward_name, station_name, min_year, max_year, min_area, max_area)
             if len(prices) >= 20:
-                median = int(statistics.median(prices))
+                median = calc_median(prices)
                 return int(median * area), len(prices), 1
 
         # レベル2: 駅×築年数のみ (min_samples=15)
         if station_name:
             prices = query_unit_prices(cursor, ward_name, station_name, min_year, max_year)
             if len(prices) >= 15:
-                median = int(statistics.median(prices))
+                median = calc_median(prices)
                 return int(median * area), len(prices), 2
 
         # レベル3: 区×築年数×面積 (min_samples=10)
         if area_bracket:
             prices = query_unit_prices(cursor, ward_name, None, min_year, max_year, min_area, max_area)
             if len(prices) >= 10:
-                median = int(statistics.median(prices))
+                median = calc_median(prices)
                 return int(median * area), len(prices), 3
 
         # レベル4: 区×築年数のみ (min_samples=5)
         prices = query_unit_prices(cursor, ward_name, None, min_year, max_year)
         if len(prices) >= 5:
-            median = int(statistics.median(prices))
+            median = calc_median(prices)
             return int(median * area), len(prices), 4
 
         # レベル5: 算出不可
@@ -224,40 +248,119 @@ def calc_median_unit_price(
         if station_name:
             prices = query_unit_prices(cursor, ward_name, station_name, min_year, max_year, min_area, max_area)
             if len(prices) >= min_sample_count:
-                return int(statistics.median(prices)), len(prices), False
+                return calc_median(prices), len(prices), False
 
         # 区単位にフォールバック
         prices = query_unit_prices(cursor, ward_name, None, min_year, max_year, min_area, max_area)
         if len(prices) >= min_sample_count:
-            return int(statistics.median(prices)), len(prices), True
+            return calc_median(prices), len(prices), True
 
         # サンプル数不足
         return None, len(prices), True
 
 
+def ensure_market_prices_schema(cursor):
+    """market_pricesにフォールバックレベル列とインデックスを用意する"""
+    cursor.execute("PRAGMA table_info(market_prices)")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    if "level" not in existing_columns:
+        cursor.execute("ALTER TABLE market_prices ADD COLUMN level INTEGER")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_market_prices_level
+        ON market_prices(level, ward_name, station_name, age_bracket, area_bracket)
+    """)
+
+
+def calc_fallback_market_prices() -> List[dict]:
+    """
+    成約データを1回走査し、全フォールバックレベルの㎡単価中央値を算出
+
+    Returns:
+        market_pricesに保存する行のリスト（最小サンプル数を満たすもののみ）
+    """
+    age_ranges = [(b, *get_age_range(b)) for b in AGE_BRACKETS]
+    area_ranges = [(b, *get_area_range(b)) for b in AREA_BRACKETS]
+
+    # (レベル, 区, 駅, 築年数帯, 面積帯) → ㎡単価リスト
+    groups = defaultdict(list)
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ward_name, station_name, building_year, area, unit_price
+            FROM transactions
+            WHERE unit_price IS NOT NULL
+              AND building_year IS NOT NULL
+        """)
+
+        for ward_name, station_name, building_year, area, unit_price in cursor.fetchall():
+            # query_unit_prices の BETWEEN 条件と同じ境界で振り分け
+            age_bracket = next(
+                (b for b, lo, hi in age_ranges if lo <= building_year <= hi), None
+            )
+            if not age_bracket:
+                continue
+
+            area_bracket = None
+            if area is not None:
+                area_bracket = next(
+                    (b for b, lo, hi in area_ranges if lo <= area <= hi), None
+                )
+
+            if station_name and area_bracket:
+                groups[(1, ward_name, station_name, age_bracket, area_bracket)].append(unit_price)
+            if station_name:
+                groups[(2, ward_name, station_name, age_bracket, None)].append(unit_price)
+            if area_bracket:
+                groups[(3, ward_name, None, age_bracket, area_bracket)].append(unit_price)
+            groups[(4, ward_name, None, age_bracket, None)].append(unit_price)
+
+    results = []
+    for (level, ward_name, station_name, age_bracket, area_bracket), prices in groups.items():
+        if len(prices) < FALLBACK_MIN_SAMPLES[level]:
+            continue
+        results.append({
+            "level": level,
+            "ward_name": ward_name,
+            "station_name": station_name,
+            "age_bracket": age_bracket,
+            "area_bracket": area_bracket,
+            "median_unit_price": calc_median(prices),
+            "sample_count": len(prices),
+        })
+
+    return results
+
+
 def save_market_prices(results: List[dict]):
     """相場データをDBに保存"""
     with get_connection() as conn:
         cursor = conn.cursor()
+        ensure_market_prices_schema(cursor)
 
         # 既存データを削除
         cursor.execute("DELETE FROM market_prices")
 
-        for r in results:
-            cursor.execute("""
-                INSERT INTO market_prices (
-                    ward_name, station_name, age_bracket, area_bracket,
-                    median_unit_price, sample_count, calculated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+        calculated_at = datetime.now().isoformat()
+        cursor.executemany("""
+            INSERT INTO market_prices (
+                level, ward_name, station_name, age_bracket, area_bracket,
+                median_unit_price, sample_count, calculated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                r.get("level"),
                 r["ward_name"],
                 r["station_name"],
                 r["age_bracket"],
                 r["area_bracket"],
                 r["median_unit_price"],
                 r["sample_count"],
-                datetime.now().isoformat(),
-            ))
+                calculated_at,
+            )
+            for r in results
+        ])
 
         conn.commit()
         return cursor.rowcount
@@ -286,59 +389,44 @@ def get_market_price(
 
 
 def main():
-    """メイン処理: 全区×全築年数帯×全面積帯の相場を算出"""
-    config = get_market_config()
-    min_sample_count = config.get("min_sample_count", 10)  # 緩和
-    age_brackets = config.get("age_brackets", ["0-10", "11-20", "21-30", "31+"])
-    area_brackets = config.get("area_brackets", ["40-50", "51-60", "61-70", "71-80", "81+"])
-
-    # 対象区を取得
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT ward_name FROM transactions")
-        wards = [row[0] for row in cursor.fetchall()]
-
-    print(f"対象区: {len(wards)}区")
-    print(f"築年数帯: {age_brackets}")
-    print(f"面積帯: {area_brackets}")
-    print(f"最小サンプル数: {min_sample_count}")
+    """メイン処理: 全フォールバックレベル（駅/区 × 築年数帯 × 面積帯）の相場を算出"""
+    print(f"築年数帯: {AGE_BRACKETS}")
+    print(f"面積帯: {AREA_BRACKETS}")
+    print(f"最小サンプル数: {FALLBACK_MIN_SAMPLES}")
     print()
 
-    results = []
-    stats = {"calculated": 0, "insufficient": 0}
+    results = calc_fallback_market_prices()
 
-    for ward in wards:
-        print(f"{ward}:")
+    level_labels = {
+        1: "駅×築年×面積",
+        2: "駅×築年のみ",
+        3: "区×築年×面積",
+        4: "区×築年のみ",
+    }
 
-        for age_bracket in age_brackets:
-            for area_bracket in area_brackets:
-                median, count, is_fallback = calc_median_unit_price(
-                    ward, None, age_bracket, area_bracket, min_sample_count
-                )
+    # 区ごとの結果を表示
+    by_ward = defaultdict(list)
+    for r in results:
+        by_ward[r["ward_name"]].append(r)
 
-                if median:
-                    results.append({
-                        "ward_name": ward,
-                        "station_name": None,  # 区単位
-                        "age_bracket": age_bracket,
-                        "area_bracket": area_bracket,
-                        "median_unit_price": median,
-                        "sample_count": count,
-                    })
-                    stats["calculated"] += 1
-                    status = f"{median:,}円/㎡ (n={count})"
-                else:
-                    stats["insufficient"] += 1
-                    status = f"サンプル不足 (n={count})"
-
-                print(f"  築{age_bracket}年 × {area_bracket}㎡: {status}")
+    print(f"対象区: {len(by_ward)}区")
+    for ward in sorted(by_ward):
+        print(f"{ward}:")
+        for r in sorted(by_ward[ward], key=lambda r: (r["level"], r["age_bracket"], r["area_bracket"] or "")):
+            if r["level"] not in (3, 4):
+                continue
+            area_label = f" × {r['area_bracket']}㎡" if r["area_bracket"] else ""
+            print(f"  L{r['level']} 築{r['age_bracket']}年{area_label}: "
+                  f"{r['median_unit_price']:,}円/㎡ (n={r['sample_count']})")
 
     # 保存
     save_market_prices(results)
 
     print()
-    print(f"算出完了: {stats['calculated']}件")
-    print(f"サンプル不足: {stats['insufficient']}件")
+    print(f"算出完了: {len(results)}件")
+    for level, label in level_labels.items():
+        count = sum(1 for r in results if r["level"] == level)
+        print(f"  L{level} ({label}): {count}件")
 
 
 if __name__ == "__main__":
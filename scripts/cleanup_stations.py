@@ -6,6 +6,7 @@
 """
 
 import re
+from functools import lru_cache
 from pathlib import Path
 import sys
 
@@ -13,7 +14,42 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
 
-
+# 駅名に含まれていたら無効とするキーワード
+INVALID_KEYWORDS = [
+    "グループ", "会社", "物件", "価格", "万円", "特典", "対象",
+    "販売", "所在地", "資料請求", "お気に入り", "追加",
+    "リノベ", "リフォーム", "角住戸", "最上階", "完工",
+    "パークハウス", "パークシティ", "プラウド", "ブリリア",
+    "ザ・", "The ", "Residence", "Luxury", "Legacy", "Elegance",
+    "Skyline", "Grand",
+    "㎡", "LDK", "DK", "階建", "築年", "沿線", "眺望",
+    "ペット", "角部屋", "南向き", "東向き", "西向き", "北向き",
+    "ガーデン", "クロック", "シリーズ"
+]
+# 全キーワードを1回の走査で判定するための選択パターン
+_INVALID_RE = re.compile("|".join(re.escape(k) for k in INVALID_KEYWORDS))
+
+
+def _scan_chars(name: str) -> tuple[bool, int, bool]:
+    """1回の走査で「英数字のみか」「数字の数」「日本語文字を含むか」を判定"""
+    ascii_only = True
+    digit_count = 0
+    has_jp = False
+    for ch in name:
+        if ch.isdecimal():
+            digit_count += 1
+        if ascii_only and not (
+            "A" <= ch <= "Z" or "a" <= ch <= "z" or "0" <= ch <= "9" or ch.isspace()
+        ):
+            ascii_only = False
+        # ひらがな/カタカナ/漢字
+        if "\u3040" <= ch <= "\u30FF" or "\u4E00" <= ch <= "\u9FFF":
+            has_jp = True
+    return ascii_only, digit_count, has_jp
+
+
+# 同じ駅名が多数の行に現れるため、判定結果を駅名ごとにキャッシュする
+@lru_cache(maxsize=8192)
 def validate_station_name(name: str) -> bool:
     """駅名が有効かどうかをバリデーション"""
     if not name:
@@ -24,32 +60,21 @@ def validate_station_name(name: str) -> bool:
         return False
 
     # 無効なキーワードを含む場合は除外
-    invalid_keywords = [
-        "グループ", "会社", "物件", "価格", "万円", "特典", "対象",
-        "販売", "所在地", "資料請求", "お気に入り", "追加",
-        "リノベ", "リフォーム", "角住戸", "最上階", "完工",
-        "パークハウス", "パークシティ", "プラウド", "ブリリア",
-        "ザ・", "The ", "Residence", "Luxury", "Legacy", "Elegance",
-        "Skyline", "Grand",
-        "㎡", "LDK", "DK", "階建", "築年", "沿線", "眺望",
-        "ペット", "角部屋", "南向き", "東向き", "西向き", "北向き",
-        "ガーデン", "クロック", "シリーズ"
-    ]
-    for keyword in invalid_keywords:
-        if keyword in name:
-            return False
+    if _INVALID_RE.search(name):
+        return False
+
+    ascii_only, digit_count, has_jp = _scan_chars(name)
 
     # 英数字のみの場合は無効（ただし短い場合は許可）
-    if re.match(r"^[A-Za-z0-9\s]+$", name) and len(name) > 5:
+    if ascii_only and len(name) > 5:
         return False
 
     # 数字が多い場合は無効（価格などの誤認識）
-    digit_count = len(re.findall(r"\d", name))
     if digit_count > 2:
         return False
 
     # ひらがな/カタカナ/漢字を含まない場合は除外（日本の駅名として不自然）
-    if not re.search(r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]", name):
+    if not has_jp:
         return False
 
     return True
@@ -60,36 +85,32 @@ def cleanup_station_names():
     print("駅名データのクリーニングを開始...")
 
     with get_connection() as conn:
+        # バリデーションをSQL関数として登録し、SQLite側で1回の走査で判定・更新する
+        conn.create_function("is_valid_station", 1, validate_station_name, deterministic=True)
         cursor = conn.cursor()
 
-        # 全駅名を取得
+        # 削除される駅名の例（表示用）
         cursor.execute("""
-            SELECT id, station_name FROM listings
+            SELECT DISTINCT station_name FROM listings
             WHERE station_name IS NOT NULL
+              AND NOT is_valid_station(station_name)
+            LIMIT 20
         """)
-        rows = cursor.fetchall()
-
-        invalid_count = 0
-        invalid_names = set()
+        invalid_names = [row[0] for row in cursor]
 
-        for row in rows:
-            listing_id = row[0]
-            station_name = row[1]
-
-            if not validate_station_name(station_name):
-                invalid_names.add(station_name)
-                cursor.execute("""
-                    UPDATE listings
-                    SET station_name = NULL, minutes_to_station = NULL
-                    WHERE id = ?
-                """, (listing_id,))
-                invalid_count += 1
+        cursor.execute("""
+            UPDATE listings
+            SET station_name = NULL, minutes_to_station = NULL
+            WHERE station_name IS NOT NULL
+              AND NOT is_valid_station(station_name)
+        """)
+        invalid_count = cursor.rowcount
 
         conn.commit()
 
     print(f"\n無効な駅名を {invalid_count} 件クリーニングしました")
     print("\n削除された駅名の例:")
-    for name in list(invalid_names)[:20]:
+    for name in invalid_names:
         print(f"  - {name[:50]}{'...' if len(name) > 50 else ''}")
 
 
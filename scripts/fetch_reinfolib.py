@@ -7,14 +7,17 @@
 
 import os
 import re
-import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 from dotenv import load_dotenv
 
 from utils.db import get_connection
+from utils.http import create_session
+from utils.json_io import loads as json_loads
+from utils.rate_limit import RateLimiter
 
 # .envファイルを読み込み
 load_dotenv(Path(__file__).parent.parent / ".env")
@@ -22,6 +25,17 @@ load_dotenv(Path(__file__).parent.parent / ".env")
 API_BASE_URL = "https://www.reinfolib.mlit.go.jp/ex-api/external/XIT001"
 API_KEY = os.getenv("REINFOLIB_API_KEY")
 
+# 並列取得のスレッド数
+MAX_WORKERS = 8
+# API負荷軽減: 全スレッド合計で毎秒2リクエストまで
+API_RATE_LIMITER = RateLimiter(2.0)
+# 取得済みの成約データをこの件数ごとにDBへ保存（中断時に失われるのは未保存分のみ）
+SAVE_BATCH_SIZE = 500
+
+# 全リクエストで接続を使い回すセッション（認証ヘッダーも1回だけ設定）
+SESSION = create_session()
+SESSION.headers.update({"Ocp-Apim-Subscription-Key": API_KEY})
+
 # 対象地域の市区町村コード
 WARD_CODES = {
     # 東京都（既存9区）
@@ -44,10 +58,20 @@ WARD_CODES = {
     "12227": "浦安市",
 }
 
+# 「2005年」形式
+_YEAR_RE = re.compile(r"(\d{4})年")
+# 和暦: 先頭文字 → (パターン, 元年の前年の西暦)
+_ERA_MAP = {
+    "令": (re.compile(r"令和(\d+)年"), 2018),
+    "平": (re.compile(r"平成(\d+)年"), 1988),
+    "昭": (re.compile(r"昭和(\d+)年"), 1925),
+}
+# 「2024年第3四半期」形式
+_PERIOD_RE = re.compile(r"(\d{4})年第(\d)四半期")
+
 
 def fetch_transactions(city_code: str, year: int, quarter: int) -> List[dict]:
     """指定した区・年・四半期の成約データを取得"""
-    headers = {"Ocp-Apim-Subscription-Key": API_KEY}
     params = {
         "year": year,
         "quarter": quarter,
@@ -55,10 +79,11 @@ def fetch_transactions(city_code: str, year: int, quarter: int) -> List[dict]:
         "priceClassification": "02",  # 成約価格のみ
     }
 
-    response = requests.get(API_BASE_URL, headers=headers, params=params)
+    API_RATE_LIMITER.acquire()
+    response = SESSION.get(API_BASE_URL, params=params)
     response.raise_for_status()
 
-    data = response.json()
+    data = json_loads(response.content)
     if data.get("status") != "OK":
         print(f"  API error: {data}")
         return []
@@ -78,18 +103,15 @@ def parse_building_year(year_str: str) -> Optional[int]:
         return None
 
     # 「2005年」形式
-    match = re.match(r"(\d{4})年", year_str)
-    if match:
-        return int(match.group(1))
-
-    # 「令和5年」形式
-    era_patterns = [
-        (r"令和(\d+)年", 2018),
-        (r"平成(\d+)年", 1988),
-        (r"昭和(\d+)年", 1925),
-    ]
-    for pattern, base in era_patterns:
-        match = re.match(pattern, year_str)
+    if year_str[0].isdigit():
+        match = _YEAR_RE.match(year_str)
+        return int(match.group(1)) if match else None
+
+    # 「令和5年」形式（先頭文字で元号を選ぶ）
+    era = _ERA_MAP.get(year_str[0])
+    if era:
+        pattern, base = era
+        match = pattern.match(year_str)
         if match:
             return base + int(match.group(1))
 
@@ -98,51 +120,53 @@ def parse_building_year(year_str: str) -> Optional[int]:
 
 def parse_period(period_str: str) -> str:
     """取引時期を日付文字列に変換（例: 2024年第3四半期 → 2024-Q3）"""
-    match = re.match(r"(\d{4})年第(\d)四半期", period_str)
+    match = _PERIOD_RE.match(period_str)
     if match:
         return f"{match.group(1)}-Q{match.group(2)}"
     return period_str
 
 
+def _transaction_row(t: dict) -> tuple:
+    """APIレスポンスの1件をINSERT用のタプルに変換"""
+    trade_price = int(t.get("TradePrice", 0))
+    area = float(t.get("Area", 0)) if t.get("Area") else None
+    unit_price = int(trade_price / area) if area else None
+
+    return (
+        t.get("MunicipalityCode"),
+        t.get("Municipality"),
+        None,  # APIに駅情報なし
+        None,  # APIに駅徒歩情報なし
+        trade_price,
+        unit_price,
+        area,
+        t.get("FloorPlan"),
+        parse_building_year(t.get("BuildingYear", "")),
+        t.get("Structure"),
+        parse_period(t.get("Period", "")),
+    )
+
+
 def save_transactions(transactions: list):
     """成約データをDBに保存"""
     if not transactions:
         return 0
 
+    rows = [_transaction_row(t) for t in transactions]
+
     with get_connection() as conn:
         cursor = conn.cursor()
-        inserted = 0
-
-        for t in transactions:
-            trade_price = int(t.get("TradePrice", 0))
-            area = float(t.get("Area", 0)) if t.get("Area") else None
-            unit_price = int(trade_price / area) if area else None
-            building_year = parse_building_year(t.get("BuildingYear", ""))
-            trade_date = parse_period(t.get("Period", ""))
-
-            cursor.execute("""
-                INSERT INTO transactions (
-                    ward_code, ward_name, station_name, minutes_to_station,
-                    trade_price, unit_price, area, floor_plan,
-                    building_year, structure, trade_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                t.get("MunicipalityCode"),
-                t.get("Municipality"),
-                None,  # APIに駅情報なし
-                None,  # APIに駅徒歩情報なし
-                trade_price,
-                unit_price,
-                area,
-                t.get("FloorPlan"),
-                building_year,
-                t.get("Structure"),
-                trade_date,
-            ))
-            inserted += 1
-
+        # 1回のexecutemanyで一括登録し、コミットも1回にまとめる
+        cursor.executemany("""
+            INSERT INTO transactions (
+                ward_code, ward_name, station_name, minutes_to_station,
+                trade_price, unit_price, area, floor_plan,
+                building_year, structure, trade_date
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
         conn.commit()
-        return inserted
+
+    return len(rows)
 
 
 def main():
@@ -152,32 +176,49 @@ def main():
         return
 
     # 過去2年分のデータを取得
-    current_year = datetime.now().year
+    now = datetime.now()
+    current_year = now.year
+    current_quarter = (now.month - 1) // 3 + 1
     years = [current_year - 1, current_year]
     quarters = [1, 2, 3, 4]
 
-    total_inserted = 0
+    # 取得対象を先に確定（未来の四半期は除外し、APIもDBも触らない）
+    tasks = [
+        (city_code, year, quarter)
+        for city_code in WARD_CODES
+        for year in years
+        for quarter in quarters
+        if not (year == current_year and quarter > current_quarter)
+    ]
 
-    for city_code, ward_name in WARD_CODES.items():
-        print(f"\n{ward_name} ({city_code}):")
-
-        for year in years:
-            for quarter in quarters:
-                # 未来の四半期はスキップ
-                current_quarter = (datetime.now().month - 1) // 3 + 1
-                if year == current_year and quarter > current_quarter:
-                    continue
-
-                print(f"  {year}年第{quarter}四半期...", end=" ")
-                try:
-                    transactions = fetch_transactions(city_code, year, quarter)
-                    count = save_transactions(transactions)
-                    total_inserted += count
-                    print(f"{count}件")
-                except requests.RequestException as e:
-                    print(f"Error: {e}")
-
-                time.sleep(0.5)  # API負荷軽減
+    print(f"{len(tasks)}件のリクエストを並列取得します（{MAX_WORKERS}スレッド）")
+
+    total_inserted = 0
+    pending = []
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        futures = {
+            executor.submit(fetch_transactions, city_code, year, quarter): (city_code, year, quarter)
+            for city_code, year, quarter in tasks
+        }
+        for future in as_completed(futures):
+            city_code, year, quarter = futures[future]
+            label = f"{WARD_CODES[city_code]} {year}年第{quarter}四半期"
+            try:
+                transactions = future.result()
+                pending.extend(transactions)
+                print(f"  {label}: {len(transactions)}件")
+            # JSONでない応答（メンテナンス画面など）は ValueError（JSONDecodeError）になる
+            except (requests.RequestException, ValueError) as e:
+                print(f"  {label}: Error: {e}")
+
+            if len(pending) >= SAVE_BATCH_SIZE:
+                total_inserted += save_transactions(pending)
+                pending.clear()
+    finally:
+        # 例外・Ctrl-C で抜けた場合も未着手のリクエストは取り消し、取得済みの分は保存する
+        executor.shutdown(wait=False, cancel_futures=True)
+        total_inserted += save_transactions(pending)
 
     print(f"\n合計 {total_inserted}件 保存しました")
 
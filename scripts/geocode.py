@@ -7,10 +7,12 @@ https://msearch.gsi.go.jp/address-search/AddressSearch
 """
 
 import json
-import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import requests
 
@@ -19,38 +21,140 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
+from scripts.utils.http import create_session
+from scripts.utils.json_io import loads as json_loads
+from scripts.utils.rate_limit import RateLimiter
 
 # 定数
 GSI_API_URL = "https://msearch.gsi.go.jp/address-search/AddressSearch"
+CACHE_DB_PATH = Path(__file__).parent.parent / "data" / "geocode_cache.db"
+# 旧形式のJSONキャッシュ（キャッシュDBが空のときに取り込む）
 CACHE_PATH = Path(__file__).parent.parent / "data" / "geocode_cache.json"
 REQUEST_INTERVAL = 1.0  # 秒
+MAX_WORKERS = 4  # キャッシュ未ヒット分の並列リクエスト数
+UPDATE_BATCH_SIZE = 200  # この件数ごとにDBへ書き込み・コミット
 
+# 全スレッド共通で REQUEST_INTERVAL 秒に1リクエストまで
+API_RATE_LIMITER = RateLimiter(1.0 / REQUEST_INTERVAL)
 
-def load_cache() -> Dict[str, Dict]:
-    """キャッシュを読み込む"""
-    if CACHE_PATH.exists():
-        try:
-            with open(CACHE_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
-    return {}
+# 全リクエストで接続を使い回すセッション
+SESSION = create_session()
 
 
-def save_cache(cache: Dict[str, Dict]) -> None:
-    """キャッシュを保存する"""
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+class GeocodeCache:
+    """
+    SQLiteに永続化するジオコードキャッシュ
 
+    辞書と同じく `address in cache` / `cache[address]` / `cache[address] = {...}` で扱える。
+    読み書きは該当行だけに触れるため、キャッシュ全体の読み込み・書き出しが不要。
+    """
 
-def geocode_address(address: str, cache: Dict[str, Dict]) -> Tuple[Optional[float], Optional[float]]:
+    def __init__(self, path: Path = CACHE_DB_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # ワーカースレッドからも使うため、アクセスはロックで直列化する
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                address TEXT PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                cached_at TEXT,
+                error INTEGER
+            )
+        """)
+        if len(self) == 0:
+            self._import_json()
+
+    def _import_json(self) -> None:
+        """旧形式のJSONキャッシュを取り込む"""
+        if not CACHE_PATH.exists():
+            return
+        try:
+            with open(CACHE_PATH, "rb") as f:
+                cache = json_loads(f.read())
+        except (json.JSONDecodeError, IOError):
+            return
+
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO geocode_cache
+                (address, latitude, longitude, cached_at, error)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (address, v.get("latitude"), v.get("longitude"), v.get("cached_at"), 1 if v.get("error") else None)
+                for address, v in cache.items()
+            ])
+            self._conn.commit()
+
+    def __contains__(self, address: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM geocode_cache WHERE address = ?", (address,)
+            ).fetchone()
+        return row is not None
+
+    def __getitem__(self, address: str) -> Dict:
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT latitude, longitude, cached_at, error
+                FROM geocode_cache WHERE address = ?
+            """, (address,)).fetchone()
+        if row is None:
+            raise KeyError(address)
+
+        entry = {"latitude": row[0], "longitude": row[1], "cached_at": row[2]}
+        if row[3]:
+            entry["error"] = True
+        return entry
+
+    def __setitem__(self, address: str, value: Dict) -> None:
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO geocode_cache
+                (address, latitude, longitude, cached_at, error)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                address,
+                value.get("latitude"),
+                value.get("longitude"),
+                value.get("cached_at"),
+                1 if value.get("error") else None,
+            ))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0]
+
+    def flush(self) -> None:
+        """未コミットの書き込みを確定する"""
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        """書き込みを確定して接続を閉じる"""
+        self.flush()
+        self._conn.close()
+
+
+def load_cache() -> GeocodeCache:
+    """キャッシュを開く"""
+    return GeocodeCache()
+
+
+def save_cache(cache: GeocodeCache) -> None:
+    """キャッシュへの書き込みを確定する"""
+    cache.flush()
+
+
+def geocode_address(address: str, cache: GeocodeCache) -> Tuple[Optional[float], Optional[float]]:
     """
     住所から緯度経度を取得する
 
     Args:
         address: 住所文字列
-        cache: キャッシュ辞書
+        cache: ジオコードキャッシュ
 
     Returns:
         (緯度, 経度) のタプル。取得できない場合は (None, None)
@@ -63,13 +167,14 @@ def geocode_address(address: str, cache: Dict[str, Dict]) -> Tuple[Optional[floa
         cached = cache[address]
         return cached.get("latitude"), cached.get("longitude")
 
-    # APIリクエスト
+    # APIリクエスト（キャッシュヒット時は待機しない）
     try:
+        API_RATE_LIMITER.acquire()
         params = {"q": address}
-        response = requests.get(GSI_API_URL, params=params, timeout=10)
+        response = SESSION.get(GSI_API_URL, params=params, timeout=10)
         response.raise_for_status()
 
-        results = response.json()
+        results = json_loads(response.content)
 
         if results and len(results) > 0:
             # 最初の結果を使用
@@ -120,16 +225,19 @@ def get_listings_without_geocode() -> list:
         return cursor.fetchall()
 
 
-def update_listing_geocode(listing_id: int, latitude: float, longitude: float) -> None:
-    """物件の緯度経度を更新"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE listings
-            SET latitude = ?, longitude = ?, updated_at = ?
-            WHERE id = ?
-        """, (latitude, longitude, datetime.now().isoformat(), listing_id))
-        conn.commit()
+def update_listing_geocodes(conn: sqlite3.Connection, rows: List[Tuple[float, float, int]]) -> None:
+    """物件の緯度経度をまとめて更新（rows: (緯度, 経度, 物件ID) のリスト）"""
+    if not rows:
+        return
+
+    now = datetime.now().isoformat()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        UPDATE listings
+        SET latitude = ?, longitude = ?, updated_at = ?
+        WHERE id = ?
+    """, [(lat, lng, now, listing_id) for lat, lng, listing_id in rows])
+    conn.commit()
 
 
 def geocode_all_listings() -> Dict:
@@ -152,37 +260,68 @@ def geocode_all_listings() -> Dict:
         "from_cache": 0,
     }
 
-    for i, listing in enumerate(listings):
-        listing_id = listing[0]
-        address = listing[1]
-        property_name = listing[2] or "不明"
-
-        print(f"\n[{i+1}/{len(listings)}] {property_name[:30]}...")
-        print(f"  住所: {address}")
+    updates = []
+    # キャッシュ未ヒットの住所 → 物件のリスト（同一住所は1回だけ問い合わせる）
+    misses: Dict[str, list] = {}
 
-        # キャッシュヒットかどうか確認
-        from_cache = address in cache
+    # DB接続は1本を使い回し、UPDATE_BATCH_SIZE 件ごとにまとめて書き込む
+    with get_connection() as conn:
+        # 1. キャッシュヒット分はレート制限なしで即時解決
+        for listing in listings:
+            address = listing[1]
+            if address not in cache:
+                misses.setdefault(address, []).append(listing)
+                continue
+
+            latitude, longitude = geocode_address(address, cache)
+            if latitude is not None and longitude is not None:
+                updates.append((latitude, longitude, listing[0]))
+                results["success"] += 1
+                results["from_cache"] += 1
+            else:
+                results["failed"] += 1
 
-        # ジオコーディング実行
-        latitude, longitude = geocode_address(address, cache)
+            if len(updates) >= UPDATE_BATCH_SIZE:
+                update_listing_geocodes(conn, updates)
+                updates.clear()
 
-        if latitude is not None and longitude is not None:
-            update_listing_geocode(listing_id, latitude, longitude)
-            print(f"  結果: ({latitude:.6f}, {longitude:.6f})" + (" [キャッシュ]" if from_cache else ""))
-            results["success"] += 1
-            if from_cache:
-                results["from_cache"] += 1
-        else:
-            print(f"  結果: 取得失敗")
-            results["failed"] += 1
+        print(f"キャッシュヒット: {results['from_cache']}件, API問い合わせ: {len(misses)}住所")
 
-        # キャッシュにない場合はAPI負荷軽減のため待機
-        if not from_cache:
-            time.sleep(REQUEST_INTERVAL)
+        # 2. キャッシュ未ヒット分は共有レート制限のもとで並列にAPI問い合わせ
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            futures = {
+                executor.submit(geocode_address, address, cache): address
+                for address in misses
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                address = futures[future]
+                latitude, longitude = future.result()
+
+                print(f"\n[{i}/{len(misses)}] {address}")
+                for listing in misses[address]:
+                    property_name = listing[2] or "不明"
+                    if latitude is not None and longitude is not None:
+                        updates.append((latitude, longitude, listing[0]))
+                        print(f"  {property_name[:30]}: ({latitude:.6f}, {longitude:.6f})")
+                        results["success"] += 1
+                    else:
+                        print(f"  {property_name[:30]}: 取得失敗")
+                        results["failed"] += 1
+
+                # 途中で中断しても取得済み分が失われないよう定期的に確定
+                if len(updates) >= UPDATE_BATCH_SIZE:
+                    update_listing_geocodes(conn, updates)
+                    updates.clear()
+                    save_cache(cache)
+        finally:
+            # 例外・Ctrl-C で抜けた場合も未着手の問い合わせは取り消し、取得済みの分は書き込む
+            executor.shutdown(wait=False, cancel_futures=True)
+            update_listing_geocodes(conn, updates)
 
     # キャッシュを保存
     save_cache(cache)
-    print(f"\nキャッシュを保存しました: {CACHE_PATH}")
+    print(f"\nキャッシュを保存しました: {CACHE_DB_PATH}")
 
     return results
 
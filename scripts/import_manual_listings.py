@@ -12,60 +12,70 @@ JSONファイルから物件データを読み込みDBに登録する。
 
 import argparse
 import hashlib
-import json
 import re
+import sqlite3
 import sys
-import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
-from scripts.geocode import geocode_address, load_cache, save_cache
+from scripts.utils.json_io import loads as json_loads
+from scripts.geocode import GeocodeCache, geocode_address, load_cache, save_cache
 
 # デフォルトJSONファイル
 DEFAULT_JSON = Path(__file__).parent.parent / "data" / "manual_listings.json"
 
+# 東京都の区 / 千葉県の市（市川市、松戸市、浦安市など）を1回の走査で抽出
+_WARD_RE = re.compile(r"東京都(?P<tokyo>.+?区)|千葉県(?P<chiba>.+?市)")
 
-def extract_ward_name(address: str) -> Optional[str]:
-    """住所から区名/市名を抽出"""
-    # 東京都の区
-    match = re.search(r"東京都(.+?区)", address)
-    if match:
-        return match.group(1)
 
-    # 千葉県の市（市川市、松戸市、浦安市など）
-    match = re.search(r"千葉県(.+?市)", address)
+@lru_cache(maxsize=4096)
+def extract_ward_name(address: str) -> Optional[str]:
+    """住所から区名/市名を抽出（東京都の区 or 千葉県の市）"""
+    match = _WARD_RE.search(address)
     if match:
-        return match.group(1)
-
+        return match.group("tokyo") or match.group("chiba")
     return None
 
 
 def generate_manual_id(address: str, price: int) -> str:
     """手動登録用のユニークID生成"""
     hash_input = f"{address}_{price}"
-    hash_value = hashlib.md5(hash_input.encode()).hexdigest()[:12]
+    # 12桁（6バイト）のダイジェストを直接生成（切り詰め不要）
+    hash_value = hashlib.blake2b(hash_input.encode(), digest_size=6).hexdigest()
     return f"manual_{hash_value}"
 
 
-def check_duplicate(address: str, price: int) -> Optional[int]:
-    """重複チェック（住所 + 価格）。既存IDを返す"""
+def load_existing_listings() -> Dict[Tuple[str, int], int]:
+    """重複チェック用に既存物件の (住所, 価格[円]) → ID を1回のクエリで読み込む"""
     with get_connection() as conn:
         cursor = conn.cursor()
+        # 既存DB向け（新規DBは init_db.py で作成済み）
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_listings_addr_price
+            ON listings(address, asking_price)
+        """)
+        conn.commit()
+
         cursor.execute("""
-            SELECT id FROM listings
-            WHERE address = ? AND asking_price = ?
-        """, (address, price * 10000))
-        row = cursor.fetchone()
-        return row[0] if row else None
+            SELECT address, asking_price, id FROM listings
+            WHERE address IS NOT NULL AND asking_price IS NOT NULL
+        """)
+        return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
 
 
-def insert_listing(data: Dict, geocode_cache: Dict) -> Tuple[bool, str, Optional[int]]:
-    """物件をDBに登録"""
+def build_listing_row(
+    data: Dict,
+    geocode_cache: GeocodeCache,
+    existing: Dict[Tuple[str, int], int],
+    seen: Set[Tuple[str, int]],
+) -> Tuple[bool, str, Optional[tuple]]:
+    """物件データをINSERT用のタプルに変換（DB登録は insert_listings でまとめて行う）"""
 
     # 必須項目チェック
     if not data.get("address") or not data.get("price"):
@@ -74,14 +84,16 @@ def insert_listing(data: Dict, geocode_cache: Dict) -> Tuple[bool, str, Optional
     address = data["address"]
     price = int(data["price"])
 
-    # 重複チェック
-    existing_id = check_duplicate(address, price)
+    # 重複チェック（DB既存分 + 同一ファイル内）
+    existing_id = existing.get((address, price * 10000))
     if existing_id:
-        return False, f"重複（ID: {existing_id}）", existing_id
+        return False, f"重複（ID: {existing_id}）", None
+    if (address, price) in seen:
+        return False, "重複（ファイル内）", None
+    seen.add((address, price))
 
     # ジオコーディング
-    lat, lng = geocode_address(address, geocode_cache)
-    time.sleep(0.3)  # APIレート制限対策
+    lat, lng = geocode_address(address, geocode_cache)  # API呼び出し時のみレート制限で待機
 
     # 区名抽出
     ward_name = extract_ward_name(address)
@@ -98,45 +110,73 @@ def insert_listing(data: Dict, geocode_cache: Dict) -> Tuple[bool, str, Optional
     else:
         pet_value = None
 
-    # DB登録
+    row = (
+        suumo_id,
+        data.get("property_name"),
+        ward_name,
+        address,
+        data.get("station"),
+        data.get("walk_minutes"),
+        price * 10000,  # 万円→円
+        data.get("area_sqm"),
+        data.get("layout"),
+        data.get("built_year"),
+        data.get("floor"),
+        data.get("total_floors"),
+        data.get("total_units"),
+        data.get("management_fee"),
+        data.get("repair_reserve"),
+        data.get("direction"),
+        pet_value,
+        lat,
+        lng,
+        "manual",
+        "manual_listings.json",
+    )
+    return True, f"登録対象 (ID: {suumo_id})", row
+
+
+_LISTING_INSERT_SQL = """
+    INSERT INTO listings (
+        suumo_id, property_name, ward_name, address,
+        station_name, minutes_to_station, asking_price,
+        area, floor_plan, building_year, floor, total_floors,
+        total_units, management_fee, repair_reserve, direction,
+        pet_allowed, latitude, longitude,
+        source, original_filename, status, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', CURRENT_TIMESTAMP)
+"""
+
+
+def insert_listings(rows: List[tuple]) -> int:
+    """
+    物件をまとめてDBに登録（executemany + 1回のコミット）
+
+    Returns:
+        int: 実際に登録できた件数（登録に失敗した行は飛ばす）
+    """
+    if not rows:
+        return 0
+
+    inserted = len(rows)
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO listings (
-                suumo_id, property_name, ward_name, address,
-                station_name, minutes_to_station, asking_price,
-                area, floor_plan, building_year, floor, total_floors,
-                total_units, management_fee, repair_reserve, direction,
-                pet_allowed, latitude, longitude,
-                source, original_filename, status, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', CURRENT_TIMESTAMP)
-        """, (
-            suumo_id,
-            data.get("property_name"),
-            ward_name,
-            address,
-            data.get("station"),
-            data.get("walk_minutes"),
-            price * 10000,  # 万円→円
-            data.get("area_sqm"),
-            data.get("layout"),
-            data.get("built_year"),
-            data.get("floor"),
-            data.get("total_floors"),
-            data.get("total_units"),
-            data.get("management_fee"),
-            data.get("repair_reserve"),
-            data.get("direction"),
-            pet_value,
-            lat,
-            lng,
-            "manual",
-            "manual_listings.json",
-        ))
-        new_id = cursor.lastrowid
+        try:
+            cursor.executemany(_LISTING_INSERT_SQL, rows)
+        except sqlite3.Error as e:
+            # 1行でも登録できない行があると一括実行全体が失敗するため、
+            # 巻き戻して1行ずつ登録し直し、失敗した行だけを飛ばす
+            print(f"\n一括登録エラー（1件ずつ登録し直します）: {e}")
+            conn.rollback()
+            for row in rows:
+                try:
+                    cursor.execute(_LISTING_INSERT_SQL, row)
+                except sqlite3.Error as e:
+                    print(f"  登録エラー ({row[1]}, ID: {row[0]}): {e}")
+                    inserted -= 1
         conn.commit()
 
-    return True, f"登録成功 (ID: {new_id})", new_id
+    return inserted
 
 
 def run_score_calculation():
@@ -167,13 +207,7 @@ def get_score_ranking(limit: int = 50) -> List[Dict]:
             LIMIT ?
         """, (limit,))
 
-        columns = [
-            'id', 'property_name', 'ward_name', 'station_name',
-            'asking_price', 'market_price', 'adjusted_market_price', 'deal_score',
-            'area', 'floor_plan', 'building_year', 'floor', 'direction',
-            'fallback_level'
-        ]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
 
 
 def print_score_list(listings: List[Dict]):
@@ -223,8 +257,8 @@ def main():
         print(f"エラー: ファイルが見つかりません: {args.file}")
         sys.exit(1)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        listings = json.load(f)
+    with open(json_path, "rb") as f:
+        listings = json_loads(f.read())
 
     print(f"読み込み: {len(listings)}件")
     print()
@@ -238,7 +272,9 @@ def main():
     success_count = 0
     skip_count = 0
     error_count = 0
-    registered_ids = []
+    rows = []
+    seen = set()
+    existing = load_existing_listings() if not args.dry_run else {}
 
     for i, data in enumerate(listings, 1):
         name = data.get("property_name", "不明")
@@ -252,11 +288,11 @@ def main():
             success_count += 1
             continue
 
-        success, message, new_id = insert_listing(data, geocode_cache)
+        success, message, row = build_listing_row(data, geocode_cache, existing, seen)
 
         if success:
             success_count += 1
-            registered_ids.append(new_id)
+            rows.append(row)
             print(f"       → {message}")
         elif "重複" in message:
             skip_count += 1
@@ -268,6 +304,14 @@ def main():
     # キャッシュ保存
     save_cache(geocode_cache)
 
+    # DB一括登録
+    if rows:
+        inserted = insert_listings(rows)
+        print(f"\nDB登録: {inserted}件")
+        # 登録対象としたが登録できなかった分はエラーとして数える
+        success_count -= len(rows) - inserted
+        error_count += len(rows) - inserted
+
     # サマリー
     print("\n" + "=" * 50)
     print("【処理結果】")
@@ -20,14 +20,19 @@ DBに登録してスコア計算する。
 """
 
 import argparse
+import asyncio
 import base64
 import hashlib
 import json
 import os
+import random
+import re
 import shutil
+import sqlite3
 import sys
-import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -35,17 +40,39 @@ from typing import Dict, List, Optional, Tuple
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
-from scripts.geocode import geocode_address, load_cache, save_cache
+from scripts.utils.rate_limit import AsyncRateLimiter
+from scripts.geocode import GeocodeCache, geocode_address, load_cache, save_cache
 
 # フォルダパス
 IMPORTS_DIR = Path(__file__).parent.parent / "imports"
 DONE_DIR = IMPORTS_DIR / "done"
 ERROR_DIR = IMPORTS_DIR / "error"
 
+# PDFのハッシュ → 抽出結果のキャッシュ（再処理時にClaude API呼び出しを省略）
+EXTRACT_CACHE_DB_PATH = Path(__file__).parent.parent / "data" / "pdf_extract_cache.db"
+
 # Claude API設定
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
 MAX_RETRIES = 3
-RETRY_DELAY = 2
+# リトライ間隔: 指数バックオフ（RETRY_BASE_DELAY * 2^試行回数、上限あり）+ ジッター
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+JSON_RETRY_MAX_DELAY = 2.0  # JSON解析エラーはAPI側の問題ではないため短めに再試行
+RETRY_JITTER = 1.0
+# レート制限（429）・過負荷（529）として扱うHTTPステータス
+RATE_LIMIT_STATUSES = (429, 529)
+MAX_CONCURRENCY = 5  # 同時に処理するPDF数（Claude APIへの同時リクエスト数）
+COMMIT_INTERVAL = 50  # 一括処理時、この件数の登録ごとにコミット
+# 1分あたりのClaude APIリクエスト上限（並行処理時のバースト対策）
+CLAUDE_RPM_LIMIT = int(os.environ.get("CLAUDE_RPM_LIMIT", "50"))
+CLAUDE_RATE_LIMITER = AsyncRateLimiter(CLAUDE_RPM_LIMIT / 60)
+
+# Claudeに送る画像: 長辺の上限（Claude Visionで縮小なしに扱えるサイズ）とJPEG品質
+MAX_IMAGE_EDGE = 1568
+JPEG_QUALITY = 85
+
+# 東京都の区 / 千葉県の市（市川市、松戸市、浦安市など）を1回の走査で抽出
+_WARD_RE = re.compile(r"東京都(?P<tokyo>.+?区)|千葉県(?P<chiba>.+?市)")
 
 # 抽出プロンプト
 EXTRACTION_PROMPT = """この不動産物件資料から以下の情報を抽出してJSONで返してください。
@@ -83,10 +110,10 @@ def check_dependencies() -> bool:
         errors.append("anthropic パッケージがありません: pip install anthropic")
 
     try:
-        from pdf2image import convert_from_path
+        from pdf2image import convert_from_bytes
         # popplerのチェック
         try:
-            convert_from_path.__wrapped__  # トリガーにはならないが、インポートは確認
+            convert_from_bytes.__wrapped__  # トリガーにはならないが、インポートは確認
         except:
             pass
     except ImportError:
@@ -106,18 +133,33 @@ def check_dependencies() -> bool:
 
 
 def pdf_to_image(pdf_path: Path) -> Optional[bytes]:
-    """PDFの1ページ目をPNG画像に変換"""
+    """PDFの1ページ目をJPEG画像に変換（長辺 MAX_IMAGE_EDGE px に縮小）"""
     try:
-        from pdf2image import convert_from_path
-
-        images = convert_from_path(str(pdf_path), dpi=150, first_page=1, last_page=1)
+        from pdf2image import convert_from_bytes
+
+        # PDFはメモリに1回だけ読み込み、pdftocairoで長辺 MAX_IMAGE_EDGE px のJPEGとして直接描画
+        # （高解像度で描画してから縮小する無駄や、PPM一時ファイルを避ける）
+        images = convert_from_bytes(
+            pdf_path.read_bytes(),
+            size=MAX_IMAGE_EDGE,
+            first_page=1,
+            last_page=1,
+            fmt="jpeg",
+            use_pdftocairo=True,
+            single_file=True,
+            thread_count=1,
+        )
         if not images:
             return None
 
+        image = images[0]
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
         # PILイメージをバイト列に変換
         import io
         buffer = io.BytesIO()
-        images[0].save(buffer, format="PNG")
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
         return buffer.getvalue()
 
     except Exception as e:
@@ -125,18 +167,82 @@ def pdf_to_image(pdf_path: Path) -> Optional[bytes]:
         return None
 
 
-def extract_info_from_image(image_bytes: bytes) -> Optional[Dict]:
+class ExtractCache:
+    """PDFの内容ハッシュ（SHA-256）→ Claudeの抽出結果 をSQLiteに永続化するキャッシュ"""
+
+    def __init__(self, path: Path = EXTRACT_CACHE_DB_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pdf_extract_cache (
+                pdf_hash TEXT PRIMARY KEY,
+                data TEXT,
+                extracted_at TEXT
+            )
+        """)
+
+    def get(self, pdf_hash: str) -> Optional[Dict]:
+        """キャッシュ済みの抽出結果を取得（なければNone）"""
+        row = self._conn.execute(
+            "SELECT data FROM pdf_extract_cache WHERE pdf_hash = ?", (pdf_hash,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, pdf_hash: str, data: Dict) -> None:
+        """抽出結果を保存"""
+        self._conn.execute("""
+            INSERT OR REPLACE INTO pdf_extract_cache (pdf_hash, data, extracted_at)
+            VALUES (?, ?, ?)
+        """, (pdf_hash, json.dumps(data, ensure_ascii=False), datetime.now().isoformat()))
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _backoff_delay(attempt: int, max_delay: float) -> float:
+    """指数バックオフ + ジッターの待機秒数"""
+    return min(max_delay, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, RETRY_JITTER)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """APIエラーの Retry-After ヘッダー（秒）を取得"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# 全リクエストで接続を使い回すClaudeクライアント（初回使用時に作成）
+_CLIENT = None
+
+
+def _get_client():
+    """共有のClaudeクライアントを取得（リトライは extract_info_from_image 側で行う）"""
+    global _CLIENT
+    if _CLIENT is None:
+        import anthropic
+
+        _CLIENT = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)
+    return _CLIENT
+
+
+async def extract_info_from_image(image_bytes: bytes) -> Optional[Dict]:
     """Claude Vision APIで画像から情報を抽出"""
     import anthropic
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    client = _get_client()
 
-    # Base64エンコード
-    image_base64 = base64.standard_b64encode(image_bytes).decode("utf-8")
+    # Base64エンコード（出力はASCIIのみ）
+    image_base64 = base64.b64encode(image_bytes).decode("ascii")
 
     for attempt in range(MAX_RETRIES):
         try:
-            message = client.messages.create(
+            await CLAUDE_RATE_LIMITER.acquire()
+            message = await client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1024,
                 messages=[
@@ -147,7 +253,7 @@ def extract_info_from_image(image_bytes: bytes) -> Optional[Dict]:
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
-                                    "media_type": "image/png",
+                                    "media_type": "image/jpeg",
                                     "data": image_base64,
                                 },
                             },
@@ -175,53 +281,87 @@ def extract_info_from_image(image_bytes: bytes) -> Optional[Dict]:
 
         except json.JSONDecodeError as e:
             print(f"  JSON解析エラー (試行 {attempt + 1}/{MAX_RETRIES}): {e}")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY)
+            delay = _backoff_delay(attempt, JSON_RETRY_MAX_DELAY)
+        except anthropic.APIStatusError as e:
+            if e.status_code in RATE_LIMIT_STATUSES:
+                print(f"  レート制限/過負荷 (試行 {attempt + 1}/{MAX_RETRIES}): {e}")
+                retry_after = _retry_after(e)
+                delay = retry_after if retry_after is not None else _backoff_delay(attempt, RETRY_MAX_DELAY)
+            else:
+                print(f"  API呼び出しエラー (試行 {attempt + 1}/{MAX_RETRIES}): {e}")
+                delay = _backoff_delay(attempt, RETRY_MAX_DELAY)
         except Exception as e:
             print(f"  API呼び出しエラー (試行 {attempt + 1}/{MAX_RETRIES}): {e}")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY)
+            delay = _backoff_delay(attempt, RETRY_MAX_DELAY)
+
+        if attempt < MAX_RETRIES - 1:
+            await asyncio.sleep(delay)
 
     return None
 
 
-def check_duplicate(address: str, price: int) -> bool:
-    """重複チェック（住所 + 価格）"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id FROM listings
-            WHERE address = ? AND asking_price = ?
-        """, (address, price * 10000))
-        return cursor.fetchone() is not None
+# 物件登録SQL（住所+価格が一致する物件があれば登録せず、RETURNING の結果が空になる）
+_LISTING_INSERT_SQL = """
+    INSERT INTO listings (
+        suumo_id, property_name, ward_name, address,
+        station_name, minutes_to_station, asking_price,
+        area, floor_plan, building_year, floor, total_floors,
+        total_units, management_fee, repair_reserve, direction,
+        pet_allowed, latitude, longitude,
+        source, original_filename, status, updated_at
+    )
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', CURRENT_TIMESTAMP
+    WHERE NOT EXISTS (
+        SELECT 1 FROM listings WHERE address = ? AND asking_price = ?
+    )
+    RETURNING id
+"""
 
 
-def extract_ward_name(address: str) -> Optional[str]:
-    """住所から区名/市名を抽出"""
-    import re
+def check_duplicate(conn: sqlite3.Connection, address: str, price: int) -> bool:
+    """重複チェック（住所 + 価格）"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id FROM listings
+        WHERE address = ? AND asking_price = ?
+    """, (address, price * 10000))
+    return cursor.fetchone() is not None
 
-    # 東京都の区
-    match = re.search(r"東京都(.+?区)", address)
-    if match:
-        return match.group(1)
 
-    # 千葉県の市（市川市、松戸市、浦安市など）
-    match = re.search(r"千葉県(.+?市)", address)
+@lru_cache(maxsize=4096)
+def extract_ward_name(address: str) -> Optional[str]:
+    """住所から区名/市名を抽出（東京都の区 or 千葉県の市）"""
+    match = _WARD_RE.search(address)
     if match:
-        return match.group(1)
-
+        return match.group("tokyo") or match.group("chiba")
     return None
 
 
 def generate_manual_id(address: str, price: int) -> str:
     """手動登録用のユニークID生成"""
     hash_input = f"{address}_{price}"
-    hash_value = hashlib.md5(hash_input.encode()).hexdigest()[:12]
+    # 12桁（6バイト）のダイジェストを直接生成（切り詰め不要）
+    hash_value = hashlib.blake2b(hash_input.encode(), digest_size=6).hexdigest()
     return f"manual_{hash_value}"
 
 
-def insert_listing(data: Dict, filename: str, geocode_cache: Dict) -> Tuple[bool, str]:
-    """物件をDBに登録"""
+def insert_listing(
+    data: Dict,
+    filename: str,
+    geocode_cache: GeocodeCache,
+    conn: Optional[sqlite3.Connection] = None,
+) -> Tuple[bool, str]:
+    """
+    物件をDBに登録
+
+    conn を渡した場合はその接続で INSERT し、コミットは呼び出し側でまとめて行う。
+    省略時は接続を開いて1件だけ登録・コミットする。
+    """
+    if conn is None:
+        with get_connection() as conn:
+            result = insert_listing(data, filename, geocode_cache, conn)
+            conn.commit()
+        return result
 
     # 必須項目チェック
     if not data.get("address") or not data.get("price"):
@@ -230,13 +370,8 @@ def insert_listing(data: Dict, filename: str, geocode_cache: Dict) -> Tuple[bool
     address = data["address"]
     price = int(data["price"])
 
-    # 重複チェック
-    if check_duplicate(address, price):
-        return False, "重複（住所+価格が一致）"
-
     # ジオコーディング
-    lat, lng = geocode_address(address, geocode_cache)
-    time.sleep(0.5)  # APIレート制限対策
+    lat, lng = geocode_address(address, geocode_cache)  # API呼び出し時のみレート制限で待機
 
     # 区名抽出
     ward_name = extract_ward_name(address)
@@ -244,109 +379,198 @@ def insert_listing(data: Dict, filename: str, geocode_cache: Dict) -> Tuple[bool
     # ID生成
     suumo_id = generate_manual_id(address, price)
 
-    # DB登録
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO listings (
-                suumo_id, property_name, ward_name, address,
-                station_name, minutes_to_station, asking_price,
-                area, floor_plan, building_year, floor, total_floors,
-                total_units, management_fee, repair_reserve, direction,
-                pet_allowed, latitude, longitude,
-                source, original_filename, status, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', CURRENT_TIMESTAMP)
-        """, (
-            suumo_id,
-            data.get("property_name"),
-            ward_name,
-            address,
-            data.get("station"),
-            data.get("walk_minutes"),
-            price * 10000,  # 万円→円
-            data.get("area_sqm"),
-            data.get("layout"),
-            data.get("built_year"),
-            data.get("floor"),
-            data.get("total_floors"),
-            data.get("total_units"),
-            data.get("management_fee"),
-            data.get("repair_reserve"),
-            data.get("direction"),
-            1 if data.get("pet_allowed") else 0,
-            lat,
-            lng,
-            "manual",
-            filename,
-        ))
-        conn.commit()
+    # DB登録（重複チェックとINSERTを1文で実行。住所+価格が一致する物件があれば登録しない）
+    cursor = conn.cursor()
+    cursor.execute(_LISTING_INSERT_SQL, (
+        suumo_id,
+        data.get("property_name"),
+        ward_name,
+        address,
+        data.get("station"),
+        data.get("walk_minutes"),
+        price * 10000,  # 万円→円
+        data.get("area_sqm"),
+        data.get("layout"),
+        data.get("built_year"),
+        data.get("floor"),
+        data.get("total_floors"),
+        data.get("total_units"),
+        data.get("management_fee"),
+        data.get("repair_reserve"),
+        data.get("direction"),
+        1 if data.get("pet_allowed") else 0,
+        lat,
+        lng,
+        "manual",
+        filename,
+        address,
+        price * 10000,
+    ))
+    if cursor.fetchone() is None:
+        return False, "重複（住所+価格が一致）"
 
     return True, f"登録成功 (ID: {suumo_id})"
 
 
-def process_pdf(pdf_path: Path, geocode_cache: Dict, dry_run: bool = False) -> Tuple[bool, str]:
-    """1つのPDFを処理"""
+async def process_pdf(
+    pdf_path: Path,
+    geocode_cache: GeocodeCache,
+    dry_run: bool = False,
+    db_lock: Optional[asyncio.Lock] = None,
+    pdf_pool: Optional[Executor] = None,
+    conn: Optional[sqlite3.Connection] = None,
+    extract_cache: Optional[ExtractCache] = None,
+) -> Tuple[bool, str]:
+    """
+    1つのPDFを処理
+
+    複数PDFを並行処理できるよう、ブロッキング処理はイベントループの外で実行する。
+    PDF→画像変換（CPU処理）は pdf_pool（プロセスプール）、未指定時はスレッドで行う。
+    conn を渡した場合、登録のコミットは呼び出し側で行う。
+    extract_cache に同じ内容のPDFの抽出結果があれば、画像変換とClaude API呼び出しを省略する。
+    """
     filename = pdf_path.name
 
     print(f"\n処理中: {filename}")
 
-    # PDF→画像変換
-    image_bytes = pdf_to_image(pdf_path)
-    if not image_bytes:
-        return False, "PDF読み取り失敗"
+    pdf_hash = hashlib.sha256(pdf_path.read_bytes()).hexdigest()
+    data = extract_cache.get(pdf_hash) if extract_cache else None
+
+    if data:
+        print(f"  [{filename}] 抽出結果キャッシュを使用")
+    else:
+        # PDF→画像変換
+        loop = asyncio.get_running_loop()
+        image_bytes = await loop.run_in_executor(pdf_pool, pdf_to_image, pdf_path)
+        if not image_bytes:
+            return False, "PDF読み取り失敗"
+
+        print(f"  [{filename}] PDF→画像変換OK")
 
-    print("  PDF→画像変換OK")
+        # Claude APIで情報抽出
+        data = await extract_info_from_image(image_bytes)
+        if not data:
+            return False, "情報抽出失敗"
 
-    # Claude APIで情報抽出
-    data = extract_info_from_image(image_bytes)
-    if not data:
-        return False, "情報抽出失敗"
+        if extract_cache:
+            extract_cache.set(pdf_hash, data)
 
-    print(f"  抽出結果: {data.get('property_name')} / {data.get('price')}万円")
+    print(f"  [{filename}] 抽出結果: {data.get('property_name')} / {data.get('price')}万円")
 
     if dry_run:
-        print(f"  [ドライラン] 抽出データ: {json.dumps(data, ensure_ascii=False, indent=2)}")
+        print(f"  [{filename}] [ドライラン] 抽出データ: {json.dumps(data, ensure_ascii=False, indent=2)}")
         return True, "ドライラン成功"
 
-    # DB登録
-    success, message = insert_listing(data, filename, geocode_cache)
+    # DB登録（重複チェック〜INSERTが他のPDFと競合しないよう直列化）
+    if db_lock is None:
+        db_lock = asyncio.Lock()
+    async with db_lock:
+        success, message = await asyncio.to_thread(insert_listing, data, filename, geocode_cache, conn)
     return success, message
 
 
-def process_all_pdfs(dry_run: bool = False) -> Dict:
-    """importsフォルダ内の全PDFを処理"""
+def _move_pdf(pdf_path: Path, dest_dir: Path) -> None:
+    """処理の終わったPDFを移動"""
+    shutil.move(str(pdf_path), str(dest_dir / pdf_path.name))
+
+
+async def _process_all_pdfs_async(
+    pdf_files: List[Path],
+    geocode_cache: GeocodeCache,
+    dry_run: bool,
+    conn: sqlite3.Connection,
+    extract_cache: ExtractCache,
+) -> Dict:
+    """
+    最大 MAX_CONCURRENCY 件ずつPDFを並行処理
+
+    完了した順に結果を表示・集計する。登録は1本の接続で COMMIT_INTERVAL 件ごとにコミットし、
+    処理済みフォルダへの移動はコミット後に行う（中断時に未登録のPDFが done に残らないように）。
+    """
     results = {"success": 0, "skipped": 0, "error": 0, "details": []}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    db_lock = asyncio.Lock()
+    uncommitted = 0
+    pending_done: List[Path] = []
+
+    async def commit_and_move() -> None:
+        nonlocal uncommitted
+        async with db_lock:
+            conn.commit()
+        for pdf_path in pending_done:
+            _move_pdf(pdf_path, DONE_DIR)
+        pending_done.clear()
+        uncommitted = 0
+
+    # PDFの描画はCPU処理のため別プロセスで行い、API呼び出しの待ち時間と重ねる
+    workers = min(os.cpu_count() or 1, MAX_CONCURRENCY)
+    with ProcessPoolExecutor(max_workers=workers) as pdf_pool:
+
+        async def bounded(pdf_path: Path) -> Tuple[Path, bool, str]:
+            async with semaphore:
+                success, message = await process_pdf(
+                    pdf_path,
+                    geocode_cache,
+                    dry_run,
+                    db_lock=db_lock,
+                    pdf_pool=pdf_pool,
+                    conn=conn,
+                    extract_cache=extract_cache,
+                )
+            return pdf_path, success, message
+
+        tasks = [bounded(pdf_path) for pdf_path in pdf_files]
+        for i, task in enumerate(asyncio.as_completed(tasks), 1):
+            pdf_path, success, message = await task
+
+            if success:
+                results["success"] += 1
+            elif "重複" in message:
+                results["skipped"] += 1
+            else:
+                results["error"] += 1
+
+            results["details"].append({"file": pdf_path.name, "success": success, "message": message})
+            print(f"  [{i}/{len(pdf_files)}] {pdf_path.name} → {message}")
+
+            if dry_run:
+                continue
 
+            if success or "重複" in message:
+                pending_done.append(pdf_path)
+                if success:
+                    uncommitted += 1
+            else:
+                _move_pdf(pdf_path, ERROR_DIR)
+
+            if uncommitted >= COMMIT_INTERVAL:
+                await commit_and_move()
+
+    if not dry_run:
+        await commit_and_move()
+    return results
+
+
+def process_all_pdfs(dry_run: bool = False) -> Dict:
+    """importsフォルダ内の全PDFを処理"""
     # PDFファイル一覧
     pdf_files = list(IMPORTS_DIR.glob("*.pdf"))
     if not pdf_files:
         print("処理対象のPDFがありません")
-        return results
+        return {"success": 0, "skipped": 0, "error": 0, "details": []}
 
-    print(f"処理対象: {len(pdf_files)}件")
+    print(f"処理対象: {len(pdf_files)}件（同時実行数: {MAX_CONCURRENCY}）")
 
     # キャッシュ読み込み
     geocode_cache = load_cache()
 
-    for pdf_path in pdf_files:
-        success, message = process_pdf(pdf_path, geocode_cache, dry_run)
-
-        if success:
-            results["success"] += 1
-            if not dry_run:
-                # 処理済みフォルダに移動
-                shutil.move(str(pdf_path), str(DONE_DIR / pdf_path.name))
-        elif "重複" in message:
-            results["skipped"] += 1
-            if not dry_run:
-                shutil.move(str(pdf_path), str(DONE_DIR / pdf_path.name))
-        else:
-            results["error"] += 1
-            if not dry_run:
-                shutil.move(str(pdf_path), str(ERROR_DIR / pdf_path.name))
-
-        results["details"].append({"file": pdf_path.name, "success": success, "message": message})
-        print(f"  → {message}")
+    # 登録用の接続は1本を使い回す（INSERTはワーカースレッドから db_lock で直列化して実行）
+    extract_cache = ExtractCache()
+    with get_connection(check_same_thread=False) as conn:
+        results = asyncio.run(
+            _process_all_pdfs_async(pdf_files, geocode_cache, dry_run, conn, extract_cache)
+        )
+    extract_cache.close()
 
     # キャッシュ保存
     save_cache(geocode_cache)
@@ -398,9 +622,9 @@ def test_with_sample_data():
     geocode_cache = load_cache()
 
     # 重複チェック
-    if check_duplicate(test_data["address"], test_data["price"]):
-        print("この物件は既に登録済みです。削除して再登録します。")
-        with get_connection() as conn:
+    with get_connection() as conn:
+        if check_duplicate(conn, test_data["address"], test_data["price"]):
+            print("この物件は既に登録済みです。削除して再登録します。")
             cursor = conn.cursor()
             cursor.execute("""
                 DELETE FROM listings WHERE address = ? AND asking_price = ?
@@ -493,7 +717,11 @@ def main():
             sys.exit(1)
 
         geocode_cache = load_cache()
-        success, message = process_pdf(pdf_path, geocode_cache, args.dry_run)
+        extract_cache = ExtractCache()
+        success, message = asyncio.run(
+            process_pdf(pdf_path, geocode_cache, args.dry_run, extract_cache=extract_cache)
+        )
+        extract_cache.close()
         save_cache(geocode_cache)
 
         if success and not args.dry_run:
@@ -6,6 +6,7 @@ SQLiteデータベース初期化スクリプト
 - transactions: 成約データ（不動産情報ライブラリ）
 - listings: 売出中物件（SUUMO）
 - market_prices: 相場データ
+- price_history: 売出価格の履歴
 """
 
 import sqlite3
@@ -63,7 +64,10 @@ def init_database():
             suumo_url TEXT,
             status TEXT DEFAULT 'active',
             first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen_at TIMESTAMP,
+            price_changed_at TIMESTAMP,
+            previous_price INTEGER
         )
     """)
 
@@ -71,6 +75,7 @@ def init_database():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS market_prices (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            level INTEGER,
             ward_name TEXT,
             station_name TEXT,
             age_bracket TEXT,
@@ -81,6 +86,17 @@ def init_database():
         )
     """)
 
+    # 売出価格の履歴（価格追跡）
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            listing_id INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (listing_id) REFERENCES listings(id)
+        )
+    """)
+
     # インデックス作成
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_transactions_station
@@ -102,10 +118,32 @@ def init_database():
         CREATE INDEX IF NOT EXISTS idx_listings_status
         ON listings(status)
     """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_listings_addr_price
+        ON listings(address, asking_price)
+    """)
+    # 売出中物件の区別検索用の部分インデックス（売却済みを含めない分だけ小さい）
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_listings_active
+        ON listings(ward_name) WHERE status = 'active'
+    """)
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_market_prices_lookup
         ON market_prices(ward_name, station_name, age_bracket, area_bracket)
     """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_market_prices_level
+        ON market_prices(level, ward_name, station_name, age_bracket, area_bracket)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_price_history_listing_id
+        ON price_history(listing_id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_price_history_recorded_at
+        ON price_history(recorded_at)
+    """)
 
     conn.commit()
     conn.close()
@@ -5,6 +5,12 @@
 追加するもの:
 - price_history テーブル
 - listings に last_seen_at, price_changed_at カラム
+- directions テーブルと listings.direction_id（向きの整数ID。トリガーで自動設定）
+- 詳細未取得物件の抽出用インデックス idx_listings_unfetched（detail_fetched カラムがある場合）
+
+price_history と listings の追加カラムは init_db.py も作成するが、directions・direction_id・
+トリガー・idx_listings_unfetched を作成するのはこのスクリプトだけのため、新規DBでも
+init_db.py の後に必ず実行する。何度実行してもよい（冪等）。
 """
 
 import sqlite3
@@ -14,13 +20,70 @@ from datetime import datetime
 DB_PATH = Path(__file__).parent.parent / "data" / "apartment.db"
 
 
+def migrate_direction_id(cursor, existing_columns: set):
+    """
+    向きの文字列ごとにIDを振る directions テーブルと listings.direction_id を用意する
+
+    IDは向きの値が初めて現れた時点で採番するため、向きの種類をコード側で列挙しない。
+    取り込み経路（SUUMO/手動/PDF）に関わらずトリガーで自動設定される。
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS directions (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    """)
+    if "direction_id" not in existing_columns:
+        cursor.execute("ALTER TABLE listings ADD COLUMN direction_id INTEGER")
+
+    # 既存データを採番・設定（旧形式のIDが入っていても振り直す）
+    cursor.execute("""
+        INSERT OR IGNORE INTO directions (name)
+        SELECT DISTINCT direction FROM listings WHERE direction IS NOT NULL
+    """)
+    cursor.execute("""
+        UPDATE listings
+        SET direction_id = (SELECT id FROM directions WHERE name = listings.direction)
+    """)
+
+    # トリガーは毎回作り直す（旧形式のトリガーを置き換える）
+    cursor.execute("DROP TRIGGER IF EXISTS trg_listings_direction_id_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_listings_direction_id_update")
+    cursor.execute("""
+        CREATE TRIGGER trg_listings_direction_id_insert
+        AFTER INSERT ON listings
+        WHEN NEW.direction IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO directions (name) VALUES (NEW.direction);
+            UPDATE listings SET direction_id = (SELECT id FROM directions WHERE name = NEW.direction)
+            WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER trg_listings_direction_id_update
+        AFTER UPDATE OF direction ON listings
+        WHEN NEW.direction IS NOT OLD.direction
+        BEGIN
+            INSERT OR IGNORE INTO directions (name)
+            SELECT NEW.direction WHERE NEW.direction IS NOT NULL;
+            UPDATE listings SET direction_id = (SELECT id FROM directions WHERE name = NEW.direction)
+            WHERE id = NEW.id;
+        END
+    """)
+
+
 def migrate():
     """マイグレーション実行"""
     print(f"マイグレーション開始: {DB_PATH}")
 
     conn = sqlite3.connect(DB_PATH)
+    # WALモードで移行中もダッシュボードからの読み取りをブロックしない
+    conn.execute("PRAGMA journal_mode=WAL")
     cursor = conn.cursor()
 
+    # テーブル作成・カラム追加・初期化を1トランザクションで行う
+    cursor.execute("BEGIN")
+
     # 1. price_history テーブル作成
     print("1. price_history テーブル作成...")
     cursor.execute("""
@@ -62,21 +125,36 @@ def migrate():
             print(f"2. listings.{col_name} は既に存在します")
 
     # 3. 既存データの初期化
-    # last_seen_at を updated_at で初期化（NULL の場合）
+    # last_seen_at を updated_at（NULL の場合は現在時刻）で初期化
     print("3. 既存データの last_seen_at を初期化...")
     cursor.execute("""
         UPDATE listings
-        SET last_seen_at = updated_at
-        WHERE last_seen_at IS NULL AND updated_at IS NOT NULL
-    """)
-
-    # last_seen_at がまだ NULL の場合は現在時刻で初期化
-    cursor.execute("""
-        UPDATE listings
-        SET last_seen_at = CURRENT_TIMESTAMP
+        SET last_seen_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
         WHERE last_seen_at IS NULL
     """)
 
+    # 4. 向きの整数ID（calc_deal_score.py が補正係数の参照に使う）
+    if "direction" in existing_columns:
+        print("4. directions テーブル・listings.direction_id を作成...")
+        migrate_direction_id(cursor, existing_columns)
+    else:
+        print("4. listings.direction がないため direction_id の作成をスキップします")
+
+    # 5. 詳細未取得物件の抽出用（詳細取得のたびに行が抜けるため常に小さく、取得列もすべて含む）
+    if "detail_fetched" in existing_columns:
+        print("5. idx_listings_unfetched を作成...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_listings_unfetched
+            ON listings(status, id, suumo_id, suumo_url, property_name)
+            WHERE status = 'active'
+              AND suumo_url IS NOT NULL
+              AND (detail_fetched IS NULL OR detail_fetched = FALSE)
+        """)
+        # 統計がないと status の通常インデックスが優先されるため、統計を取り直す
+        cursor.execute("ANALYZE listings")
+    else:
+        print("5. listings.detail_fetched がないため idx_listings_unfetched の作成をスキップします")
+
     conn.commit()
 
     # 確認
@@ -6,15 +6,19 @@ SUUMOスクレイパー
 条件: 2LDK以上、50㎡以上、駅徒歩15分以内、5,000万〜1.3億
 """
 
+import argparse
 import re
-import time
+import sqlite3
 import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 # 親ディレクトリをパスに追加
 import sys
@@ -22,6 +26,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
 from scripts.utils.config import load_config
+from scripts.utils.http import clear_cache, create_session, get_cached
+from scripts.utils.rate_limit import RateLimiter
 
 # 地域コードマッピング（都道府県, SUUMOコード）
 AREA_CODES = {
@@ -48,18 +54,102 @@ AREA_CODES = {
 # 後方互換用（既存コードとの互換性）
 WARD_CODES = {name: code for name, (_, code) in AREA_CODES.items()}
 
+# 住所中の地域名を1回の走査で見つけるための選択パターン
+_AREA_NAME_RE = re.compile("|".join(re.escape(name) for name in AREA_CODES))
+
 # 間取りコード（2LDK以上）
 # ts=7: 2LDK, ts=8: 3K, ts=9: 3DK, ts=10: 3LDK, ts=11: 4K以上
 FLOOR_PLAN_CODES = [7, 8, 9, 10, 11]
 
 BASE_URL = "https://suumo.jp/ms/chuko/{prefecture}/{area_code}/"
 
+PAGE_INTERVAL = 2  # ページ取得間隔（秒、全地域合計で PAGE_INTERVAL 秒に1ページまで）
+MAX_WORKERS = 4  # 同時にスクレイピングする地域数
+# 並行取得する全地域で共有し、サーバーへのリクエスト総数を逐次取得時以下に抑える
+PAGE_RATE_LIMITER = RateLimiter(1.0 / PAGE_INTERVAL)
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
     "Accept-Language": "ja,en-US;q=0.7,en;q=0.3",
 }
 
+# 検索結果ページのうち、物件カードとページネーションだけをパースする
+_PAGE_CLASSES = ("property_unit", "cassetteitem", "pagination_set", "pagination")
+
+
+def _is_page_element(css_class: Optional[str]) -> bool:
+    """物件カード・ページネーションの要素か（class属性は複数値の場合もある）"""
+    if not css_class:
+        return False
+    return "pager" in css_class or any(c in _PAGE_CLASSES for c in css_class.split())
+
+
+PAGE_STRAINER = SoupStrainer(class_=_is_page_element)
+
+# 検索結果ページのHTTPキャッシュ（requests-cache がある場合のみ使用）
+HTTP_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "suumo_http.sqlite"
+
+# 全地域・全ページで接続を使い回すセッション（スレッド間で共有）
+SESSION = create_session(cache_path=HTTP_CACHE_PATH)
+SESSION.headers.update(HEADERS)
+
+# パース用の正規表現（物件カードごとに何度も使うため事前にコンパイル）
+_DIRECTIONS = "南西|南東|北西|北東|南|北|東|西"
+# 鉄道会社名、または「○○線」で終わる路線名
+_RAILWAY_LINES = (
+    r"JR|東京メトロ|都営|東急|小田急|京王|西武|東武|京成|京急|相鉄|"
+    r"りんかい線|ゆりかもめ|日暮里・舎人ライナー|つくばエクスプレス|[^\s「」]{2,8}線"
+)
+
+# 「1億2,000万」「9500万」（億・万を1回の走査で取得）、または「1億」のみ
+_PRICE_FULL_RE = re.compile(r"(?:(\d+)億\s*)?(\d{1,3}(?:,\d{3})+|\d+)\s*万|(\d+)億")
+_AREA_RE = re.compile(r"([\d.]+)\s*m")
+_YEAR_RE = re.compile(r"(\d{4})年")
+_CHIKU_RE = re.compile(r"築(\d+)年")
+_WALK_RE = re.compile(r"徒歩(\d+)分")
+_STATION_QUOTED_RE = re.compile(r"[「『]([^」』]{1,15})[」』]\s*徒歩\d+分")
+_STATION_LINE_RE = re.compile(rf"(?:{_RAILWAY_LINES})[「『]([^」』]{{1,10}})[」』]")
+_STATION_EKI_RE = re.compile(r"[「『]([^」』]{1,10})[」』]駅")
+_FLOOR_OF_RE = re.compile(r"(\d+)階.*?(\d+)階建")
+_FLOOR_RE = re.compile(r"(\d+)階")
+_DIRECTION_SUFFIX_RE = re.compile(rf"({_DIRECTIONS})向き")
+_DIRECTION_LABEL_RE = re.compile(rf"向き\s*[:：]\s*({_DIRECTIONS})")
+_DIRECTION_BALCONY_RE = re.compile(rf"バルコニー\s*[:：]?\s*({_DIRECTIONS})")
+_NC_PATH_RE = re.compile(r"nc_(\d+)")
+_NC_QUERY_RE = re.compile(r"nc=(\d+)")
+_PRICE_CARD_RE = re.compile(r"(\d+億)?(\d+)?万円")
+_ADDRESS_RE = re.compile(r"(東京都[^\s]+区[^\s]*|千葉県[^\s]+市[^\s]*)")
+_AREA_CARD_RE = re.compile(r"([\d.]+)\s*m\s*[2²㎡]?")
+_PLAN_RE = re.compile(r"(\d[LDKS]+|\d+LDK|\d+DK|\d+K)")
+_BUILT_LABEL_RE = re.compile(r"築年月\s*[:：]?\s*(\d{4})年")
+_BUILT_INLINE_RE = re.compile(r"(\d{4})年\d*月?築")
+# リノベ・リフォーム等の語と、その前後20文字以内にある「YYYY年」
+_RENO_WINDOW = 25  # キーワードの最大長（5文字）+ 20文字
+_RENO_BEFORE_RE = re.compile(r"(?:リノベ|リフォーム|改装|内装).{0,20}\Z")
+_RENO_AFTER_RE = re.compile(r".{0,20}(?:リノベ|リフォーム|改装|完了|完成)")
+_RENO_KEYWORDS = ("リノベ", "リフォーム", "改装", "内装", "完了", "完成")  # 上記2パターンに現れる語
+_FLOOR_SLASH_RE = re.compile(r"(\d+)階\s*[/／]\s*(\d+)階建")
+_FLOOR_BUILDING_FIRST_RE = re.compile(r"(\d+)階建[のて　\s]*(\d+)階")
+_FLOOR_LABEL_RE = re.compile(r"所在階\s*[:：]?\s*(\d+)階")
+_FLOOR_PART_RE = re.compile(r"(\d+)階部分")
+_FLOOR_STANDALONE_RE = re.compile(r"(\d+)階(?!建)")
+
+# 駅名として無効なキーワード
+_INVALID_KEYWORDS = (
+    "グループ", "会社", "物件", "価格", "万円", "特典", "対象",
+    "販売", "所在地", "資料請求", "お気に入り", "追加",
+    "リノベ", "リフォーム", "角住戸", "最上階", "完工",
+    "パークハウス", "パークシティ", "プラウド", "ブリリア",
+    "ザ・", "The ", "Residence", "Luxury", "Legacy", "Elegance",
+    "Skyline", "Grand",
+    "㎡", "LDK", "DK", "階建", "築年", "沿線", "眺望",
+    "ペット", "角部屋", "南向き", "東向き", "西向き", "北向き",
+    "ガーデン", "クロック", "シリーズ",
+)
+# 全キーワードを1回の走査で判定する選択パターン
+_INVALID_KEYWORDS_RE = re.compile("|".join(re.escape(k) for k in _INVALID_KEYWORDS))
+
 
 def build_search_url(prefecture: str, area_code: str, page: int = 1) -> str:
     """検索URLを構築（フィルターはPython側で適用）"""
@@ -94,16 +184,16 @@ def parse_price(price_str: str) -> Optional[int]:
         return None
 
     # 「9500万円」「1億2000万円」などをパース
-    price_str = price_str.replace(",", "").replace(" ", "")
-
-    oku_match = re.search(r"(\d+)億", price_str)
-    man_match = re.search(r"(\d+)万", price_str)
+    match = _PRICE_FULL_RE.search(price_str)
+    if not match:
+        return None
 
+    oku, man, oku_only = match.groups()
     total = 0
-    if oku_match:
-        total += int(oku_match.group(1)) * 100000000
-    if man_match:
-        total += int(man_match.group(1)) * 10000
+    if oku or oku_only:
+        total += int(oku or oku_only) * 100000000
+    if man:
+        total += int(man.replace(",", "")) * 10000
 
     return total if total > 0 else None
 
@@ -113,7 +203,7 @@ def parse_area(area_str: str) -> Optional[float]:
     if not area_str:
         return None
 
-    match = re.search(r"([\d.]+)\s*m", area_str)
+    match = _AREA_RE.search(area_str)
     if match:
         return float(match.group(1))
     return None
@@ -125,12 +215,12 @@ def parse_building_year(year_str: str) -> Optional[int]:
         return None
 
     # 「2019年7月」形式
-    match = re.search(r"(\d{4})年", year_str)
+    match = _YEAR_RE.search(year_str)
     if match:
         return int(match.group(1))
 
     # 「築30年」形式
-    match = re.search(r"築(\d+)年", year_str)
+    match = _CHIKU_RE.search(year_str)
     if match:
         current_year = datetime.now().year
         return current_year - int(match.group(1))
@@ -144,30 +234,27 @@ def parse_station_info(station_str: str) -> Tuple[Optional[str], Optional[int]]:
         return None, None
 
     # 徒歩分を先に取得
-    walk_match = re.search(r"徒歩(\d+)分", station_str)
+    walk_match = _WALK_RE.search(station_str)
     minutes = int(walk_match.group(1)) if walk_match else None
 
     # 駅名パターン（優先度順）
     station_name = None
 
     # パターン1: 「駅名」徒歩X分 の形式（徒歩の直前の「」内）
-    pattern1 = re.search(r"[「『]([^」』]{1,15})[」』]\s*徒歩\d+分", station_str)
+    pattern1 = _STATION_QUOTED_RE.search(station_str)
     if pattern1:
         station_name = pattern1.group(1)
 
     # パターン2: 路線名「駅名」の形式
     if not station_name:
         # JR/私鉄/地下鉄の路線名の後の「」
-        pattern2 = re.search(
-            r"(?:JR|東京メトロ|都営|東急|小田急|京王|西武|東武|京成|京急|相鉄|りんかい線|ゆりかもめ|日暮里・舎人ライナー|つくばエクスプレス|[^\s「」]{2,8}線)[「『]([^」』]{1,10})[」』]",
-            station_str
-        )
+        pattern2 = _STATION_LINE_RE.search(station_str)
         if pattern2:
             station_name = pattern2.group(1)
 
     # パターン3: 「駅名」駅 の形式
     if not station_name:
-        pattern3 = re.search(r"[「『]([^」』]{1,10})[」』]駅", station_str)
+        pattern3 = _STATION_EKI_RE.search(station_str)
         if pattern3:
             station_name = pattern3.group(1)
 
@@ -178,6 +265,8 @@ def parse_station_info(station_str: str) -> Tuple[Optional[str], Optional[int]]:
     return station_name, minutes
 
 
+# 同じ駅名が多数の物件に現れるため、判定結果を駅名ごとにキャッシュする
+@lru_cache(maxsize=4096)
 def validate_station_name(name: str) -> Optional[str]:
     """駅名が有効かどうかをバリデーション"""
     if not name:
@@ -188,27 +277,17 @@ def validate_station_name(name: str) -> Optional[str]:
         return None
 
     # 無効なキーワードを含む場合は除外
-    invalid_keywords = [
-        "グループ", "会社", "物件", "価格", "万円", "特典", "対象",
-        "販売", "所在地", "資料請求", "お気に入り", "追加",
-        "リノベ", "リフォーム", "角住戸", "最上階", "完工",
-        "パークハウス", "パークシティ", "プラウド", "ブリリア",
-        "ザ・", "The ", "Residence", "Luxury", "Legacy", "Elegance",
-        "Skyline", "Grand",
-        "㎡", "LDK", "DK", "階建", "築年", "沿線", "眺望",
-        "ペット", "角部屋", "南向き", "東向き", "西向き", "北向き",
-        "ガーデン", "クロック", "シリーズ"
-    ]
-    for keyword in invalid_keywords:
-        if keyword in name:
-            return None
-
-    # 英数字のみの場合は無効（ただし短い場合は許可）
-    if re.match(r"^[A-Za-z0-9\s]+$", name) and len(name) > 5:
+    if _INVALID_KEYWORDS_RE.search(name):
+        return None
+
+    # 英数字のみの場合は無効（ただし短い場合は許可。日本語の駅名は1文字目で判定が終わる）
+    if len(name) > 5 and all(
+        "A" <= ch <= "Z" or "a" <= ch <= "z" or "0" <= ch <= "9" or ch.isspace() for ch in name
+    ):
         return None
 
     # 数字が多い場合は無効（価格などの誤認識）
-    digit_count = len(re.findall(r"\d", name))
+    digit_count = sum(1 for ch in name if ch.isdecimal())
     if digit_count > 2:
         return None
 
@@ -221,12 +300,12 @@ def parse_floor_info(floor_str: str) -> Tuple[Optional[int], Optional[int]]:
         return None, None
 
     # 「3階/10階建」形式
-    match = re.search(r"(\d+)階.*?(\d+)階建", floor_str)
+    match = _FLOOR_OF_RE.search(floor_str)
     if match:
         return int(match.group(1)), int(match.group(2))
 
     # 「3階」のみ
-    match = re.search(r"(\d+)階", floor_str)
+    match = _FLOOR_RE.search(floor_str)
     if match:
         return int(match.group(1)), None
 
@@ -240,17 +319,17 @@ def parse_direction(text: str) -> Optional[str]:
 
     # 向きパターン（優先度順）
     # パターン1: 「南向き」「南東向き」など
-    direction_match = re.search(r"(南西|南東|北西|北東|南|北|東|西)向き", text)
+    direction_match = _DIRECTION_SUFFIX_RE.search(text)
     if direction_match:
         return direction_match.group(1)
 
     # パターン2: 「向き:南」「向き：南東」など
-    direction_match = re.search(r"向き\s*[:：]\s*(南西|南東|北西|北東|南|北|東|西)", text)
+    direction_match = _DIRECTION_LABEL_RE.search(text)
     if direction_match:
         return direction_match.group(1)
 
     # パターン3: 「バルコニー南向き」「バルコニー：南」など
-    direction_match = re.search(r"バルコニー\s*[:：]?\s*(南西|南東|北西|北東|南|北|東|西)", text)
+    direction_match = _DIRECTION_BALCONY_RE.search(text)
     if direction_match:
         return direction_match.group(1)
 
@@ -260,25 +339,23 @@ def parse_direction(text: str) -> Optional[str]:
 def generate_suumo_id(url: str) -> str:
     """URLからユニークIDを生成"""
     # nc_XXXXX/ 形式を抽出（URLパス内）
-    match = re.search(r"nc_(\d+)", url)
+    match = _NC_PATH_RE.search(url)
     if match:
         return f"suumo_{match.group(1)}"
 
     # nc=XXXXX 形式を抽出（クエリパラメータ）
-    match = re.search(r"nc=(\d+)", url)
+    match = _NC_QUERY_RE.search(url)
     if match:
         return f"suumo_{match.group(1)}"
 
-    # URLのハッシュを使用
-    return f"suumo_{hashlib.md5(url.encode()).hexdigest()[:12]}"
+    # URLのハッシュを使用（12桁＝6バイトのダイジェストを直接生成）
+    return f"suumo_{hashlib.blake2b(url.encode(), digest_size=6).hexdigest()}"
 
 
 def extract_ward_from_address(address: str) -> Optional[str]:
     """住所から区名/市名を抽出"""
-    for area_name in AREA_CODES.keys():
-        if area_name in address:
-            return area_name
-    return None
+    match = _AREA_NAME_RE.search(address)
+    return match.group(0) if match else None
 
 
 def scrape_listing_page(soup: BeautifulSoup, ward_name: str) -> List[Dict]:
@@ -313,26 +390,29 @@ def parse_property_card(card: BeautifulSoup, default_ward: str) -> Optional[Dict
     if not title_link:
         title_link = card.select_one("a")
 
-    if title_link:
-        listing["property_name"] = title_link.get_text(strip=True)
-        href = title_link.get("href", "")
-        if href.startswith("/"):
-            listing["suumo_url"] = f"https://suumo.jp{href}"
-        else:
-            listing["suumo_url"] = href
-        listing["suumo_id"] = generate_suumo_id(listing["suumo_url"])
+    # リンクがなければIDを作れないため、カード全体のテキスト取得・パースをせずに除外
+    if not title_link:
+        return None
+
+    listing["property_name"] = title_link.get_text(strip=True)
+    href = title_link.get("href", "")
+    if href.startswith("/"):
+        listing["suumo_url"] = f"https://suumo.jp{href}"
+    else:
+        listing["suumo_url"] = href
+    listing["suumo_id"] = generate_suumo_id(listing["suumo_url"])
 
     # テキスト全体を取得してパース
     text = card.get_text(" ", strip=True)
 
     # 価格
-    price_match = re.search(r"(\d+億)?(\d+)?万円", text)
+    price_match = _PRICE_CARD_RE.search(text)
     if price_match:
         price_str = price_match.group(0)
         listing["asking_price"] = parse_price(price_str)
 
     # 所在地（東京都/千葉県に対応）
-    address_match = re.search(r"(東京都[^\s]+区[^\s]*|千葉県[^\s]+市[^\s]*)", text)
+    address_match = _ADDRESS_RE.search(text)
     if address_match:
         listing["address"] = address_match.group(0)
         listing["ward_name"] = extract_ward_from_address(listing["address"]) or default_ward
@@ -345,7 +425,7 @@ def parse_property_card(card: BeautifulSoup, default_ward: str) -> Optional[Dict
     listing["minutes_to_station"] = minutes
 
     # 面積（50㎡以上のみ採用、駅距離との混同を避ける）
-    area_matches = re.findall(r"([\d.]+)\s*m\s*[2²㎡]?", text)
+    area_matches = _AREA_CARD_RE.findall(text)
     for match in area_matches:
         try:
             area_val = float(match)
@@ -356,60 +436,64 @@ def parse_property_card(card: BeautifulSoup, default_ward: str) -> Optional[Dict
             continue
 
     # 間取り
-    plan_match = re.search(r"(\d[LDKS]+|\d+LDK|\d+DK|\d+K)", text)
+    plan_match = _PLAN_RE.search(text)
     if plan_match:
         listing["floor_plan"] = plan_match.group(1)
 
     # 築年（リノベ・リフォーム年と区別する）
     # 優先度1: 「築年月」ラベルの後の年
-    year_match = re.search(r"築年月\s*[:：]?\s*(\d{4})年", text)
+    # 各パターンに必須の文字列がなければ正規表現を実行しない（カードの多くは該当しない）
+    year_match = "築年月" in text and _BUILT_LABEL_RE.search(text)
     if year_match:
         listing["building_year"] = int(year_match.group(1))
     else:
         # 優先度2: 「○年○月築」パターン
-        year_match = re.search(r"(\d{4})年\d*月?築", text)
+        year_match = "築" in text and _BUILT_INLINE_RE.search(text)
         if year_match:
             listing["building_year"] = int(year_match.group(1))
         else:
             # 優先度3: リノベ・リフォーム以外の文脈での年（1960-2010年の範囲で古い方を採用）
             # 2020年以降はリノベ年の可能性が高いため除外
-            year_matches = re.findall(r"(\d{4})年", text)
-            valid_years = []
-            for y in year_matches:
-                year_int = int(y)
-                # リノベ・リフォームの近くにある年は除外
-                pattern = rf"(リノベ|リフォーム|改装|内装).{{0,20}}{y}年|{y}年.{{0,20}}(リノベ|リフォーム|改装|完了|完成)"
-                if not re.search(pattern, text) and 1960 <= year_int <= 2025:
-                    valid_years.append(year_int)
+            year_matches = list(_YEAR_RE.finditer(text))
+            # リノベ・リフォームの近くに現れる年は除外（同じ年が他の箇所にあっても除外）
+            renovation_years = {
+                m.group(1) for m in year_matches
+                if _RENO_BEFORE_RE.search(text, max(0, m.start() - _RENO_WINDOW), m.start())
+                or _RENO_AFTER_RE.match(text, m.end())
+            } if any(keyword in text for keyword in _RENO_KEYWORDS) else set()
+            valid_years = [
+                int(m.group(1)) for m in year_matches
+                if m.group(1) not in renovation_years and 1960 <= int(m.group(1)) <= 2025
+            ]
             if valid_years:
                 # 最も古い年を築年とする（新しい年はリノベ年の可能性）
                 listing["building_year"] = min(valid_years)
 
     # 階数（複数パターンに対応）
     # パターン1: 「3階/10階建」「3階／10階建」
-    floor_match = re.search(r"(\d+)階\s*[/／]\s*(\d+)階建", text)
+    floor_match = "階建" in text and _FLOOR_SLASH_RE.search(text)
     if floor_match:
         listing["floor"] = int(floor_match.group(1))
         listing["total_floors"] = int(floor_match.group(2))
     else:
         # パターン2: 「10階建　3階部分」「10階建の3階」
-        floor_match = re.search(r"(\d+)階建[のて　\s]*(\d+)階", text)
+        floor_match = "階建" in text and _FLOOR_BUILDING_FIRST_RE.search(text)
         if floor_match:
             listing["total_floors"] = int(floor_match.group(1))
             listing["floor"] = int(floor_match.group(2))
         else:
             # パターン3: 「所在階3階」「所在階:3階」
-            floor_match = re.search(r"所在階\s*[:：]?\s*(\d+)階", text)
+            floor_match = "所在階" in text and _FLOOR_LABEL_RE.search(text)
             if floor_match:
                 listing["floor"] = int(floor_match.group(1))
             else:
                 # パターン4: 「3階部分」（階建の前ではない場所）
-                floor_match = re.search(r"(\d+)階部分", text)
+                floor_match = "階部分" in text and _FLOOR_PART_RE.search(text)
                 if floor_match:
                     listing["floor"] = int(floor_match.group(1))
                 else:
                     # パターン5: 単独の「X階」（ただし「X階建」は除外）
-                    floor_matches = re.findall(r"(\d+)階(?!建)", text)
+                    floor_matches = "階" in text and _FLOOR_STANDALONE_RE.findall(text)
                     if floor_matches:
                         # 最初にマッチしたものを採用（通常は所在階）
                         listing["floor"] = int(floor_matches[0])
@@ -417,7 +501,7 @@ def parse_property_card(card: BeautifulSoup, default_ward: str) -> Optional[Dict
     # 向き（方角）
     listing["direction"] = parse_direction(text)
 
-    return listing if listing.get("suumo_id") else None
+    return listing
 
 
 def get_total_pages(soup: BeautifulSoup) -> int:
@@ -444,44 +528,108 @@ def scrape_ward(ward_name: str, max_pages: int = 3) -> List[Dict]:
     prefecture, area_code = area_info
     all_listings = []
     page = 1
+    total_pages = 0
 
     while page <= max_pages:
         url = build_search_url(prefecture, area_code, page)
-        print(f"  ページ {page}: {url}")
+        print(f"  [{ward_name}] ページ {page}: {url}")
 
         try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
+            # キャッシュ済みならレート制限の待機なしで使う
+            response = get_cached(SESSION, url, timeout=30)
+            if response is None:
+                PAGE_RATE_LIMITER.acquire()
+                response = SESSION.get(url, timeout=30)
             response.raise_for_status()
         except requests.RequestException as e:
-            print(f"  リクエストエラー: {e}")
+            print(f"  [{ward_name}] リクエストエラー: {e}")
             break
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(response.content, "lxml", parse_only=PAGE_STRAINER)
 
         # 物件を抽出
         listings = scrape_listing_page(soup, ward_name)
         if not listings:
-            print(f"  物件が見つかりません")
+            print(f"  [{ward_name}] 物件が見つかりません")
             break
 
         all_listings.extend(listings)
-        print(f"  {len(listings)}件取得")
+        print(f"  [{ward_name}] {len(listings)}件取得")
 
-        # 次のページがあるか確認
-        total_pages = get_total_pages(soup)
+        # 次のページがあるか確認（総ページ数は、前回読んだ値に達したときだけ現在のページから読み直す。
+        # ページネーションが近くのページ番号しか表示しない場合も最終ページまで進めるように）
         if page >= total_pages:
-            break
+            total_pages = get_total_pages(soup)
+            if page >= total_pages:
+                break
 
         page += 1
-        time.sleep(2)  # 礼儀正しく待機
 
     return all_listings
 
 
-def save_listings(listings: List[Dict]) -> Dict:
+# 新規物件
+_LISTING_INSERT_SQL = """
+    INSERT INTO listings (
+        suumo_id, property_name, ward_name, address,
+        station_name, minutes_to_station, asking_price,
+        area, floor_plan, building_year, floor, total_floors,
+        direction, suumo_url, status,
+        first_seen_at, last_seen_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', ?, ?, ?)
+"""
+
+# 価格変動前の価格を履歴に記録（今回新規登録した物件もあるため suumo_id から id を引く）
+_PRICE_HISTORY_INSERT_SQL = """
+    INSERT INTO price_history (listing_id, price, recorded_at)
+    SELECT id, ?, ? FROM listings WHERE suumo_id = ?
+"""
+
+# 既存物件（価格変動あり）
+_PRICE_CHANGED_UPDATE_SQL = """
+    UPDATE listings SET
+        asking_price = ?,
+        previous_price = ?,
+        price_changed_at = ?,
+        station_name = COALESCE(?, station_name),
+        minutes_to_station = COALESCE(?, minutes_to_station),
+        floor = COALESCE(?, floor),
+        total_floors = COALESCE(?, total_floors),
+        direction = COALESCE(?, direction),
+        status = 'active',
+        last_seen_at = ?,
+        updated_at = ?
+    WHERE suumo_id = ?
+"""
+
+# 既存物件（価格変動なし: 掲載確認日時などのみ更新）
+_UNCHANGED_UPDATE_SQL = """
+    UPDATE listings SET
+        station_name = COALESCE(?, station_name),
+        minutes_to_station = COALESCE(?, minutes_to_station),
+        floor = COALESCE(?, floor),
+        total_floors = COALESCE(?, total_floors),
+        direction = COALESCE(?, direction),
+        status = 'active',
+        last_seen_at = ?,
+        updated_at = ?
+    WHERE suumo_id = ?
+"""
+
+
+def save_listings(
+    listings: List[Dict],
+    now: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
+) -> Dict:
     """
     物件をDBに保存（価格変動検知付き）
 
+    Args:
+        listings: 物件のリスト
+        now: 記録する日時（省略時は現在時刻）
+        conn: 使い回すDB接続（省略時はこの呼び出しのために接続を開く）
+
     Returns:
         Dict: {
             "saved": int,
@@ -499,34 +647,36 @@ def save_listings(listings: List[Dict]) -> Dict:
         "price_changed": 0,
         "price_drops": [],
     }
-    now = datetime.now().isoformat()
+    now = now or datetime.now().isoformat()
 
-    with get_connection() as conn:
+    insert_rows = []
+    changed_rows = []
+    unchanged_rows = []
+    history_rows = []
+
+    with nullcontext(conn) if conn is not None else get_connection() as conn:
         cursor = conn.cursor()
 
+        # 既存物件をまとめて取得（suumo_id → (価格, 物件名, 区名)）
+        suumo_ids = list({listing.get("suumo_id") for listing in listings})
+        placeholders = ",".join("?" * len(suumo_ids))
+        cursor.execute(f"""
+            SELECT suumo_id, asking_price, property_name, ward_name
+            FROM listings WHERE suumo_id IN ({placeholders})
+        """, suumo_ids)
+        known = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+
         for listing in listings:
             try:
-                suumo_id = listing.get("suumo_id")
+                suumo_id = listing["suumo_id"]
                 new_price = listing.get("asking_price")
-
-                # 既存物件を確認
-                cursor.execute("""
-                    SELECT id, asking_price, property_name, ward_name
-                    FROM listings WHERE suumo_id = ?
-                """, (suumo_id,))
-                existing = cursor.fetchone()
+                existing = known.get(suumo_id)
 
                 if existing:
                     # 既存物件: 価格変動チェック
-                    listing_id, old_price, prop_name, ward = existing
+                    old_price, prop_name, ward = existing
 
                     if old_price and new_price and old_price != new_price:
-                        # 価格変動あり → price_history に記録
-                        cursor.execute("""
-                            INSERT INTO price_history (listing_id, price, recorded_at)
-                            VALUES (?, ?, ?)
-                        """, (listing_id, old_price, now))
-
                         # 値下げの場合は記録
                         if new_price < old_price:
                             price_diff = old_price - new_price
@@ -540,24 +690,10 @@ def save_listings(listings: List[Dict]) -> Dict:
                                 "diff_pct": price_diff_pct,
                             })
 
+                        # 価格変動あり → price_history に記録
+                        history_rows.append((old_price, now, suumo_id))
                         result["price_changed"] += 1
-
-                        # UPDATE（価格変動あり）
-                        cursor.execute("""
-                            UPDATE listings SET
-                                asking_price = ?,
-                                previous_price = ?,
-                                price_changed_at = ?,
-                                station_name = COALESCE(?, station_name),
-                                minutes_to_station = COALESCE(?, minutes_to_station),
-                                floor = COALESCE(?, floor),
-                                total_floors = COALESCE(?, total_floors),
-                                direction = COALESCE(?, direction),
-                                status = 'active',
-                                last_seen_at = ?,
-                                updated_at = ?
-                            WHERE suumo_id = ?
-                        """, (
+                        changed_rows.append((
                             new_price,
                             old_price,
                             now,
@@ -570,20 +706,10 @@ def save_listings(listings: List[Dict]) -> Dict:
                             now,
                             suumo_id,
                         ))
+                        known[suumo_id] = (new_price, prop_name, ward)
                     else:
                         # 価格変動なし: last_seen_at のみ更新
-                        cursor.execute("""
-                            UPDATE listings SET
-                                station_name = COALESCE(?, station_name),
-                                minutes_to_station = COALESCE(?, minutes_to_station),
-                                floor = COALESCE(?, floor),
-                                total_floors = COALESCE(?, total_floors),
-                                direction = COALESCE(?, direction),
-                                status = 'active',
-                                last_seen_at = ?,
-                                updated_at = ?
-                            WHERE suumo_id = ?
-                        """, (
+                        unchanged_rows.append((
                             listing.get("station_name"),
                             listing.get("minutes_to_station"),
                             listing.get("floor"),
@@ -595,15 +721,7 @@ def save_listings(listings: List[Dict]) -> Dict:
                         ))
                 else:
                     # 新規物件
-                    cursor.execute("""
-                        INSERT INTO listings (
-                            suumo_id, property_name, ward_name, address,
-                            station_name, minutes_to_station, asking_price,
-                            area, floor_plan, building_year, floor, total_floors,
-                            direction, suumo_url, status,
-                            first_seen_at, last_seen_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active', ?, ?, ?)
-                    """, (
+                    insert_rows.append((
                         suumo_id,
                         listing.get("property_name"),
                         listing.get("ward_name"),
@@ -622,56 +740,111 @@ def save_listings(listings: List[Dict]) -> Dict:
                         now,
                         now,
                     ))
+                    # 同じ物件が複数ページに現れた場合は2件目以降を既存物件として扱う
+                    known[suumo_id] = (new_price, listing.get("property_name"), listing.get("ward_name"))
                     result["new"] += 1
 
                 result["saved"] += 1
-
             except Exception as e:
+                # 不正な物件データは飛ばして残りを保存する
                 print(f"  保存エラー: {e}")
                 continue
 
+        # (SQL, 行, 失敗した行を差し引く集計キー)
+        statements = [
+            (_LISTING_INSERT_SQL, insert_rows, ("saved", "new")),
+            (_PRICE_HISTORY_INSERT_SQL, history_rows, ()),
+            (_PRICE_CHANGED_UPDATE_SQL, changed_rows, ("saved", "price_changed")),
+            (_UNCHANGED_UPDATE_SQL, unchanged_rows, ("saved",)),
+        ]
+        try:
+            for sql, rows, _ in statements:
+                cursor.executemany(sql, rows)
+        except sqlite3.Error as e:
+            # 1行でも不正な行があると一括実行全体が失敗するため、
+            # 巻き戻して1行ずつ保存し直し、失敗した行だけを飛ばす
+            print(f"  一括保存エラー（1件ずつ保存し直します）: {e}")
+            conn.rollback()
+            for sql, rows, keys in statements:
+                for row in rows:
+                    try:
+                        cursor.execute(sql, row)
+                    except sqlite3.Error as e:
+                        print(f"  保存エラー: {e}")
+                        for key in keys:
+                            result[key] -= 1
+
         conn.commit()
 
     return result
 
 
-def mark_sold_listings(scraped_suumo_ids: set) -> int:
+def mark_sold_listings(scraped_suumo_ids: set, now: Optional[str] = None) -> int:
     """
     今回のスクレイピングで見つからなかった物件を sold にマーク
 
     Args:
         scraped_suumo_ids: 今回スクレイピングで見つかった suumo_id のセット
+        now: 記録する日時（省略時は現在時刻）
 
     Returns:
         int: sold にマークした件数
     """
-    now = datetime.now().isoformat()
+    now = now or datetime.now().isoformat()
 
     with get_connection() as conn:
         cursor = conn.cursor()
 
-        # アクティブな物件を取得
+        # 今回見つかった suumo_id を一時テーブルに入れ、差分はSQL側で求める
+        cursor.execute("CREATE TEMP TABLE seen_suumo_ids (suumo_id TEXT PRIMARY KEY)")
+        cursor.executemany(
+            "INSERT OR IGNORE INTO seen_suumo_ids VALUES (?)",
+            ((suumo_id,) for suumo_id in scraped_suumo_ids),
+        )
+
+        # 今回見つからなかったアクティブな物件を sold にマーク
         cursor.execute("""
-            SELECT suumo_id FROM listings
+            UPDATE listings
+            SET status = 'sold', last_seen_at = ?
             WHERE status = 'active' AND source = 'suumo'
-        """)
-        active_ids = {row[0] for row in cursor.fetchall()}
-
-        # 今回見つからなかった物件
-        missing_ids = active_ids - scraped_suumo_ids
+              AND suumo_id NOT IN (SELECT suumo_id FROM seen_suumo_ids)
+        """, (now,))
+        sold_count = cursor.rowcount
 
-        if missing_ids:
-            # sold にマーク
-            placeholders = ",".join("?" * len(missing_ids))
-            cursor.execute(f"""
-                UPDATE listings
-                SET status = 'sold', last_seen_at = ?
-                WHERE suumo_id IN ({placeholders})
-            """, [now] + list(missing_ids))
-
-            conn.commit()
+        conn.commit()
+        cursor.execute("DROP TABLE seen_suumo_ids")
+
+        return sold_count
+
+
+def _save_ward_results(
+    conn: sqlite3.Connection, ward_name: str, listings: List[Dict], results: Dict
+) -> None:
+    """1地域分の取得結果を保存し、全体の集計に加える"""
+    print(f"\n=== {ward_name} ===")
+
+    save_result = save_listings(listings, results["scraped_at"], conn)
+
+    # 今回取得した suumo_id を記録
+    for listing in listings:
+        if listing.get("suumo_id"):
+            results["all_suumo_ids"].add(listing["suumo_id"])
+
+    results["total_scraped"] += len(listings)
+    results["total_saved"] += save_result["saved"]
+    results["total_new"] += save_result["new"]
+    results["total_price_changed"] += save_result["price_changed"]
+    results["all_price_drops"].extend(save_result["price_drops"])
+    results["by_ward"][ward_name] = {
+        "scraped": len(listings),
+        "saved": save_result["saved"],
+        "new": save_result["new"],
+        "price_changed": save_result["price_changed"],
+    }
 
-        return len(missing_ids)
+    new_str = f", 新着{save_result['new']}件" if save_result["new"] else ""
+    price_str = f", 価格変動{save_result['price_changed']}件" if save_result["price_changed"] else ""
+    print(f"  合計: {len(listings)}件取得, {save_result['saved']}件保存{new_str}{price_str}")
 
 
 def scrape_all_wards(max_pages_per_ward: int = 3) -> Dict:
@@ -687,43 +860,40 @@ def scrape_all_wards(max_pages_per_ward: int = 3) -> Dict:
         "all_price_drops": [],
         "all_suumo_ids": set(),
         "by_ward": {},
+        # 全地域の保存・掲載終了検知で同じ日時を記録する
+        "scraped_at": datetime.now().isoformat(),
     }
 
-    for ward_name in target_wards:
-        print(f"\n=== {ward_name} ===")
-
-        listings = scrape_ward(ward_name, max_pages=max_pages_per_ward)
-        save_result = save_listings(listings)
-
-        # 今回取得した suumo_id を記録
-        for listing in listings:
-            if listing.get("suumo_id"):
-                results["all_suumo_ids"].add(listing["suumo_id"])
-
-        results["total_scraped"] += len(listings)
-        results["total_saved"] += save_result["saved"]
-        results["total_new"] += save_result["new"]
-        results["total_price_changed"] += save_result["price_changed"]
-        results["all_price_drops"].extend(save_result["price_drops"])
-        results["by_ward"][ward_name] = {
-            "scraped": len(listings),
-            "saved": save_result["saved"],
-            "new": save_result["new"],
-            "price_changed": save_result["price_changed"],
-        }
-
-        new_str = f", 新着{save_result['new']}件" if save_result["new"] else ""
-        price_str = f", 価格変動{save_result['price_changed']}件" if save_result["price_changed"] else ""
-        print(f"  合計: {len(listings)}件取得, {save_result['saved']}件保存{new_str}{price_str}")
-
-        # 区間で待機
-        time.sleep(3)
+    # 地域ごとの取得は待ち時間が大半のため、MAX_WORKERS 地域ずつ並行して取得する
+    # （全地域合計で PAGE_INTERVAL 秒ごとに1ページ）。DB保存は取得が終わった地域から順に、
+    # メインスレッドで1本の接続を使い回して行う
+    with get_connection() as conn:
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            futures = {
+                executor.submit(scrape_ward, ward_name, max_pages_per_ward): ward_name
+                for ward_name in target_wards
+            }
+            for future in as_completed(futures):
+                ward_name = futures[future]
+                listings = future.result()
+                _save_ward_results(conn, ward_name, listings, results)
+        finally:
+            # 例外・Ctrl-C で抜けた場合は未着手の地域を取り消し、残りの地域の取得完了を待たずに終了する
+            executor.shutdown(wait=False, cancel_futures=True)
 
     return results
 
 
 def main():
     """メイン実行"""
+    parser = argparse.ArgumentParser(description="SUUMOスクレイパー")
+    parser.add_argument("--no-cache", action="store_true", help="HTTPキャッシュを削除してから取得")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        clear_cache(SESSION)
+
     print("SUUMOスクレイピング開始")
     print(f"実行日時: {datetime.now().isoformat()}")
 
@@ -732,9 +902,12 @@ def main():
 
     # 掲載終了物件を検知
     print("\n=== 掲載終了検知 ===")
-    sold_count = mark_sold_listings(results["all_suumo_ids"])
+    sold_count = mark_sold_listings(results["all_suumo_ids"], results["scraped_at"])
     print(f"掲載終了: {sold_count}件")
 
+    cache_info = validate_station_name.cache_info()
+    print(f"駅名判定キャッシュ: ヒット{cache_info.hits}件 / ミス{cache_info.misses}件")
+
     print("\n=== 結果サマリー ===")
     print(f"総取得件数: {results['total_scraped']}")
     print(f"総保存件数: {results['total_saved']}")
@@ -16,19 +16,23 @@ SUUMO詳細ページスクレイパー
 import argparse
 import random
 import re
+import sqlite3
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.utils.db import get_connection
+from scripts.utils.http import clear_cache, create_session, get_cached
+from scripts.utils.rate_limit import RateLimiter
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -36,16 +40,83 @@ HEADERS = {
     "Accept-Language": "ja,en-US;q=0.7,en;q=0.3",
 }
 
+# 詳細ページのHTTPキャッシュ（requests-cache がある場合のみ使用）
+# 中断後の再実行で、DBへの書き込み前だった取得済みページを再取得しないようにする
+HTTP_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "suumo_detail_http.sqlite"
+
+# 全詳細ページで keep-alive 接続を使い回すセッション（ワーカースレッド間で共有）
+SESSION = create_session(cache_path=HTTP_CACHE_PATH)
+SESSION.headers.update(HEADERS)
+
+# 詳細ページは本文（body）だけをパースする（head内のスクリプト・スタイル等は不要）
+DETAIL_STRAINER = SoupStrainer("body")
+
+# パース用の正規表現（事前にコンパイル）
+_STRUCTURES = "SRC|RC|S造|鉄骨鉄筋|鉄筋|鉄骨|木造"
+_FEE_MAN_RE = re.compile(r"(\d+)万")
+_FEE_YEN_RE = re.compile(r"(\d+)円")
+_DIGITS_RE = re.compile(r"(\d+)")
+_UNITS_RE = re.compile(r"(\d+)\s*戸")
+_FLOORS_RE = re.compile(r"(\d+)階建")
+_MANAGEMENT_FEE_RE = re.compile(r"管理費[^0-9円万]*(\d[万\d,]*円)")
+_REPAIR_RESERVE_RE = re.compile(r"修繕[^0-9円万]*(\d[万\d,]*円)")
+_TOTAL_UNITS_RE = re.compile(r"総戸数[^0-9]*(\d+)\s*戸")
+_STRUCTURE_FLOORS_RE = re.compile(rf"({_STRUCTURES})?(\d+)階建")
+_STRUCTURE_LABEL_RE = re.compile(rf"構造[^a-zA-Z]*({_STRUCTURES})")
+
+# 構造タイプ（表記 → 分類、優先度順）
+STRUCTURE_TYPES = (
+    ("SRC", "SRC"),
+    ("RC", "RC"),
+    ("S造", "S"),
+    ("鉄骨鉄筋", "SRC"),
+    ("鉄筋", "RC"),
+    ("鉄骨", "S"),
+    ("木造", "木造"),
+)
+
+# 設備・環境フラグの判定キーワード（いずれかを含めば True）
+# 「眺望良好」⊃「眺望良」のように他の語を含む語は、短い方の判定で足りるため省く
+PET_KEYWORDS = ("ペット可", "ペット相談", "小型犬可", "猫可", "ペット飼育可")
+VIEW_KEYWORDS = ("眺望良", "眺望◎", "眺望○")
+SUNLIGHT_KEYWORDS = ("陽当り良", "日当たり良", "陽当◎", "陽当○", "日当り良")
+
 # リトライ設定
 MAX_RETRIES = 3
 RETRY_BASE_DELAY = 5  # 秒
 
+MAX_WORKERS = 4  # 同時に取得する詳細ページ数
+REQUEST_RATE = 0.4  # 1秒あたりの最大リクエスト数（全スレッド合計、リトライを含む）
+REQUEST_JITTER = 0.5  # リクエスト間隔のゆらぎ（秒）。2〜3秒間隔で逐次取得していた頃と同じ頻度
+DETAIL_RATE_LIMITER = RateLimiter(REQUEST_RATE, jitter=REQUEST_JITTER)
+UPDATE_BATCH_SIZE = 200  # この件数ごとにDBへ書き込み・コミット
+
+
+def check_unfetched_index() -> Optional[str]:
+    """
+    詳細未取得物件の抽出用インデックス（migrate_price_tracking.py で作成）があるか確認する
+
+    Returns:
+        問題がある場合はその内容（問題なければNone）
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_listings_unfetched'"
+        )
+        if cursor.fetchone() is None:
+            return (
+                "idx_listings_unfetched インデックスがありません（抽出が遅くなります）。"
+                "migrate_price_tracking.py を実行してください"
+            )
+
+    return None
+
 
 def get_unfetched_listings(limit: Optional[int] = None) -> List[Dict]:
     """詳細未取得の物件一覧を取得"""
     with get_connection() as conn:
         cursor = conn.cursor()
-
         query = """
             SELECT id, suumo_id, suumo_url, property_name
             FROM listings
@@ -59,8 +130,7 @@ def get_unfetched_listings(limit: Optional[int] = None) -> List[Dict]:
             query += f" LIMIT {limit}"
 
         cursor.execute(query)
-        columns = ['id', 'suumo_id', 'suumo_url', 'property_name']
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
 
 
 def parse_fee(fee_str: str) -> Optional[int]:
@@ -75,8 +145,8 @@ def parse_fee(fee_str: str) -> Optional[int]:
     if fee_str in ["-", "－", "なし", "―"]:
         return 0
 
-    man_match = re.search(r"(\d+)万", fee_str)
-    yen_match = re.search(r"(\d+)円", fee_str)
+    man_match = _FEE_MAN_RE.search(fee_str)
+    yen_match = _FEE_YEN_RE.search(fee_str)
 
     total = 0
     if man_match:
@@ -86,7 +156,7 @@ def parse_fee(fee_str: str) -> Optional[int]:
     if man_match and yen_match:
         # 「万」の後から「円」の前までの数字を取得
         after_man = fee_str[fee_str.index("万")+1:]
-        digit_match = re.search(r"(\d+)", after_man)
+        digit_match = _DIGITS_RE.search(after_man)
         if digit_match:
             total += int(digit_match.group(1))
     elif yen_match and not man_match:
@@ -101,7 +171,7 @@ def parse_total_units(units_str: str) -> Optional[int]:
     if not units_str:
         return None
 
-    match = re.search(r"(\d+)\s*戸", units_str)
+    match = _UNITS_RE.search(units_str)
     if match:
         return int(match.group(1))
     return None
@@ -116,23 +186,13 @@ def parse_structure_and_floors(structure_str: str) -> Tuple[Optional[str], Optio
     total_floors = None
 
     # 構造タイプを抽出
-    structure_patterns = [
-        (r"SRC", "SRC"),
-        (r"RC", "RC"),
-        (r"S造", "S"),
-        (r"鉄骨鉄筋", "SRC"),
-        (r"鉄筋", "RC"),
-        (r"鉄骨", "S"),
-        (r"木造", "木造"),
-    ]
-
-    for pattern, struct_type in structure_patterns:
-        if re.search(pattern, structure_str):
+    for keyword, struct_type in STRUCTURE_TYPES:
+        if keyword in structure_str:
             structure = struct_type
             break
 
     # 階数を抽出
-    floor_match = re.search(r"(\d+)階建", structure_str)
+    floor_match = _FLOORS_RE.search(structure_str)
     if floor_match:
         total_floors = int(floor_match.group(1))
 
@@ -141,9 +201,15 @@ def parse_structure_and_floors(structure_str: str) -> Tuple[Optional[str], Optio
 
 def fetch_detail_page(url: str) -> Optional[str]:
     """詳細ページを取得（リトライ付き）"""
+    # キャッシュ済みならレート制限の待機なしで返す
+    cached = get_cached(SESSION, url, timeout=30)
+    if cached is not None:
+        return cached.text
+
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
+            DETAIL_RATE_LIMITER.acquire()
+            response = SESSION.get(url, timeout=30)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -159,29 +225,29 @@ def fetch_detail_page(url: str) -> Optional[str]:
 
 def parse_detail_page(html: str) -> Dict:
     """詳細ページをパース"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml", parse_only=DETAIL_STRAINER)
     details = {}
 
     # ページ全体のテキストを取得
     page_text = soup.get_text(" ", strip=True)
 
     # 管理費（テキストから直接検索）
-    fee_match = re.search(r"管理費[^0-9円万]*(\d[万\d,]*円)", page_text)
+    fee_match = _MANAGEMENT_FEE_RE.search(page_text)
     if fee_match:
         details["management_fee"] = parse_fee(fee_match.group(1))
 
     # 修繕積立金
-    repair_match = re.search(r"修繕[^0-9円万]*(\d[万\d,]*円)", page_text)
+    repair_match = _REPAIR_RESERVE_RE.search(page_text)
     if repair_match:
         details["repair_reserve"] = parse_fee(repair_match.group(1))
 
     # 総戸数
-    units_match = re.search(r"総戸数[^0-9]*(\d+)\s*戸", page_text)
+    units_match = _TOTAL_UNITS_RE.search(page_text)
     if units_match:
         details["total_units"] = int(units_match.group(1))
 
     # 構造・階建て
-    structure_match = re.search(r"(SRC|RC|S造|鉄骨鉄筋|鉄筋|鉄骨|木造)?(\d+)階建", page_text)
+    structure_match = _STRUCTURE_FLOORS_RE.search(page_text)
     if structure_match:
         details["total_floors"] = int(structure_match.group(2))
         if structure_match.group(1):
@@ -191,57 +257,63 @@ def parse_detail_page(html: str) -> Dict:
 
     # 構造のみ（階建てとは別に記載されている場合）
     if "structure" not in details:
-        struct_only_match = re.search(r"構造[^a-zA-Z]*(SRC|RC|S造|鉄骨鉄筋|鉄筋|鉄骨|木造)", page_text)
+        struct_only_match = _STRUCTURE_LABEL_RE.search(page_text)
         if struct_only_match:
             structure, _ = parse_structure_and_floors(struct_only_match.group(1))
             if structure:
                 details["structure"] = structure
 
     # ペット可否
-    pet_keywords = ["ペット可", "ペット相談", "小型犬可", "猫可", "ペット飼育可"]
-    details["pet_allowed"] = any(kw in page_text for kw in pet_keywords)
+    details["pet_allowed"] = any(kw in page_text for kw in PET_KEYWORDS)
 
     # 眺望良好
-    view_keywords = ["眺望良好", "眺望良", "眺望◎", "眺望○"]
-    details["good_view"] = any(kw in page_text for kw in view_keywords)
+    details["good_view"] = any(kw in page_text for kw in VIEW_KEYWORDS)
 
     # 陽当り良好
-    sunlight_keywords = ["陽当り良好", "陽当り良", "日当たり良好", "日当たり良", "陽当◎", "陽当○", "日当り良"]
-    details["good_sunlight"] = any(kw in page_text for kw in sunlight_keywords)
+    details["good_sunlight"] = any(kw in page_text for kw in SUNLIGHT_KEYWORDS)
 
     return details
 
 
-def update_listing_details(listing_id: int, details: Dict):
-    """物件詳細をDBに保存"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # 更新するフィールドを構築
-        update_fields = ["detail_fetched = TRUE", "updated_at = CURRENT_TIMESTAMP"]
-        params = []
-
-        field_mapping = {
-            "total_units": "total_units",
-            "total_floors": "total_floors",
-            "management_fee": "management_fee",
-            "repair_reserve": "repair_reserve",
-            "structure": "structure",
-            "pet_allowed": "pet_allowed",
-            "good_view": "good_view",
-            "good_sunlight": "good_sunlight",
-        }
-
-        for key, column in field_mapping.items():
-            if key in details and details[key] is not None:
-                update_fields.append(f"{column} = ?")
-                params.append(details[key])
-
-        params.append(listing_id)
+def fetch_and_parse(listing: Dict) -> Tuple[Dict, Optional[Dict]]:
+    """詳細ページを取得してパース（取得失敗時は詳細がNone）"""
+    html = fetch_detail_page(listing["suumo_url"])
+    if not html:
+        return listing, None
+    return listing, parse_detail_page(html)
+
+
+# 詳細ページから取得する項目（キー名とカラム名は同一）
+DETAIL_COLUMNS = [
+    "total_units",
+    "total_floors",
+    "management_fee",
+    "repair_reserve",
+    "structure",
+    "pet_allowed",
+    "good_view",
+    "good_sunlight",
+]
+
+# 取得できなかった項目（None）は既存の値を残す
+_DETAIL_UPDATE_SQL = (
+    "UPDATE listings SET "
+    + ", ".join(f"{column} = COALESCE(?, {column})" for column in DETAIL_COLUMNS)
+    + ", detail_fetched = TRUE, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+)
+
+
+def update_listing_details(conn: sqlite3.Connection, rows: List[Tuple[int, Dict]]) -> None:
+    """物件詳細をまとめてDBに保存（rows: (物件ID, 詳細) のリスト）"""
+    if not rows:
+        return
 
-        query = f"UPDATE listings SET {', '.join(update_fields)} WHERE id = ?"
-        cursor.execute(query, params)
-        conn.commit()
+    cursor = conn.cursor()
+    cursor.executemany(_DETAIL_UPDATE_SQL, [
+        tuple(details.get(column) for column in DETAIL_COLUMNS) + (listing_id,)
+        for listing_id, details in rows
+    ])
+    conn.commit()
 
 
 def scrape_details(limit: Optional[int] = None, verbose: bool = True):
@@ -267,71 +339,76 @@ def scrape_details(limit: Optional[int] = None, verbose: bool = True):
         "good_sunlight_count": 0,
     }
 
-    for i, listing in enumerate(listings, 1):
-        listing_id = listing["id"]
-        url = listing["suumo_url"]
-        name = listing["property_name"][:30] if listing["property_name"] else "不明"
-
-        if verbose:
-            print(f"[{i}/{total}] {name}...")
-
-        # 詳細ページを取得
-        html = fetch_detail_page(url)
-        if not html:
-            stats["failed"] += 1
-            # 取得失敗でもdetail_fetchedをTRUEにして再試行を防ぐ
-            update_listing_details(listing_id, {})
-            continue
-
-        # パース
-        details = parse_detail_page(html)
-
-        # 統計を更新
-        if details.get("total_units"):
-            stats["total_units_found"] += 1
-        if details.get("management_fee"):
-            stats["management_fee_found"] += 1
-        if details.get("pet_allowed"):
-            stats["pet_allowed_count"] += 1
-        if details.get("good_view"):
-            stats["good_view_count"] += 1
-        if details.get("good_sunlight"):
-            stats["good_sunlight_count"] += 1
-
-        # DB更新
-        update_listing_details(listing_id, details)
-        stats["success"] += 1
-
-        if verbose:
-            info_parts = []
-            if details.get("total_units"):
-                info_parts.append(f"{details['total_units']}戸")
-            if details.get("total_floors"):
-                info_parts.append(f"{details['total_floors']}階建")
-            if details.get("management_fee"):
-                info_parts.append(f"管理費{details['management_fee']}円")
-            if details.get("pet_allowed"):
-                info_parts.append("ペット可")
-            if details.get("good_view"):
-                info_parts.append("眺望良")
-            if details.get("good_sunlight"):
-                info_parts.append("陽当り良")
-
-            info_str = " / ".join(info_parts) if info_parts else "情報なし"
-            print(f"    → {info_str}")
-
-        # 進捗表示（100件ごと）
-        if i % 100 == 0:
-            print(f"\n--- 進捗: {i}/{total}件完了 ({i/total*100:.1f}%) ---")
-            print(f"    成功: {stats['success']}, 失敗: {stats['failed']}")
-            print(f"    総戸数取得: {stats['total_units_found']}, 管理費取得: {stats['management_fee_found']}")
-            print(f"    ペット可: {stats['pet_allowed_count']}, 眺望良: {stats['good_view_count']}, 陽当り良: {stats['good_sunlight_count']}")
-            print(f"--- 10秒休憩 ---\n")
-            time.sleep(10)
-        else:
-            # 通常のwait（2-3秒ランダム）
-            wait_time = random.uniform(2, 3)
-            time.sleep(wait_time)
+    # 取得は待ち時間が大半のため MAX_WORKERS 件ずつ並行して行い（全体で REQUEST_RATE 件/秒まで）、
+    # パース済みの結果を完了順にDBへ保存する
+    updates = []
+    with get_connection() as conn:
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            futures = [executor.submit(fetch_and_parse, listing) for listing in listings]
+            for i, future in enumerate(as_completed(futures), 1):
+                listing, details = future.result()
+                listing_id = listing["id"]
+                name = listing["property_name"][:30] if listing["property_name"] else "不明"
+
+                if verbose:
+                    print(f"[{i}/{total}] {name}...")
+
+                if details is None:
+                    stats["failed"] += 1
+                    # 取得失敗でもdetail_fetchedをTRUEにして再試行を防ぐ
+                    updates.append((listing_id, {}))
+                    continue
+
+                # 統計を更新
+                if details.get("total_units"):
+                    stats["total_units_found"] += 1
+                if details.get("management_fee"):
+                    stats["management_fee_found"] += 1
+                if details.get("pet_allowed"):
+                    stats["pet_allowed_count"] += 1
+                if details.get("good_view"):
+                    stats["good_view_count"] += 1
+                if details.get("good_sunlight"):
+                    stats["good_sunlight_count"] += 1
+
+                updates.append((listing_id, details))
+                stats["success"] += 1
+
+                # UPDATE_BATCH_SIZE 件ごとにまとめて書き込む（残りは終了時・中断時に書き込む）
+                if len(updates) >= UPDATE_BATCH_SIZE:
+                    update_listing_details(conn, updates)
+                    updates.clear()
+
+                if verbose:
+                    info_parts = []
+                    if details.get("total_units"):
+                        info_parts.append(f"{details['total_units']}戸")
+                    if details.get("total_floors"):
+                        info_parts.append(f"{details['total_floors']}階建")
+                    if details.get("management_fee"):
+                        info_parts.append(f"管理費{details['management_fee']}円")
+                    if details.get("pet_allowed"):
+                        info_parts.append("ペット可")
+                    if details.get("good_view"):
+                        info_parts.append("眺望良")
+                    if details.get("good_sunlight"):
+                        info_parts.append("陽当り良")
+
+                    info_str = " / ".join(info_parts) if info_parts else "情報なし"
+                    print(f"    → {info_str}")
+
+                # 進捗表示（100件ごと）
+                if i % 100 == 0:
+                    print(f"\n--- 進捗: {i}/{total}件完了 ({i/total*100:.1f}%) ---")
+                    print(f"    成功: {stats['success']}, 失敗: {stats['failed']}")
+                    print(f"    総戸数取得: {stats['total_units_found']}, 管理費取得: {stats['management_fee_found']}")
+                    print(f"    ペット可: {stats['pet_allowed_count']}, 眺望良: {stats['good_view_count']}, 陽当り良: {stats['good_sunlight_count']}")
+                    print()
+        finally:
+            # 例外・Ctrl-C で抜けた場合も未着手の取得は取り消し、取得済みの分は書き込む
+            executor.shutdown(wait=False, cancel_futures=True)
+            update_listing_details(conn, updates)
 
     # 最終結果
     print("\n" + "=" * 60)
@@ -351,11 +428,19 @@ def main():
     parser = argparse.ArgumentParser(description="SUUMO詳細ページスクレイパー")
     parser.add_argument("--limit", type=int, help="取得件数制限（テスト用）")
     parser.add_argument("--quiet", action="store_true", help="詳細ログを抑制")
+    parser.add_argument("--no-cache", action="store_true", help="HTTPキャッシュを削除してから取得")
     args = parser.parse_args()
 
+    if args.no_cache:
+        clear_cache(SESSION)
+
     print("SUUMO詳細ページスクレイピング開始")
     print(f"実行日時: {datetime.now().isoformat()}")
 
+    problem = check_unfetched_index()
+    if problem:
+        print(f"警告: {problem}")
+
     scrape_details(limit=args.limit, verbose=not args.quiet)
 
 
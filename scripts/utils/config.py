@@ -2,16 +2,27 @@
 設定ファイル読み込みユーティリティ
 """
 
-import yaml
+from functools import lru_cache
 from pathlib import Path
 
+import yaml
+
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "settings.yml"
 
+# LibYAML（C拡張）付きでビルドされていれば高速なローダーを使用する
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
+@lru_cache(maxsize=1)
 def load_config() -> dict:
-    """設定ファイルを読み込む"""
+    """
+    設定ファイルを読み込む
+
+    結果はプロセス内でキャッシュされ、全呼び出しで同じ辞書を返す（呼び出し側で変更しないこと）。
+    ファイルを書き換えた後に読み直す場合は load_config.cache_clear() を呼ぶ。
+    """
     with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YAML_LOADER)
 
 
 def get_target_wards() -> list:
@@ -24,9 +35,3 @@ def get_filters() -> dict:
     """フィルター条件を取得"""
     config = load_config()
     return config.get("filters", {})
-
-
-def get_market_config() -> dict:
-    """相場計算の設定を取得"""
-    config = load_config()
-    return config.get("market", {})
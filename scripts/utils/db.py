@@ -3,6 +3,7 @@
 """
 
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -11,14 +12,40 @@ DB_PATH = Path(__file__).parent.parent.parent / "data" / "apartment.db"
 # SQLiteロック対策: タイムアウトを30秒に設定
 DB_TIMEOUT = 30
 
+# 接続ごとに設定するPRAGMA
+# - synchronous=NORMAL: WALモードではコミット毎のfsyncを省いても破損しない（電源断時に直近のコミットが失われ得るのみ）
+# - temp_store=MEMORY: ソートや一時テーブルをメモリ上で処理
+# - cache_size=-64000: ページキャッシュを約64MBに拡大
+# - mmap_size: 読み込みをメモリマップ経由にし、read() のコピーを省く（256MBまで）
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+]
+
+# journal_mode=WAL はDBファイルに保存される設定のため、プロセス内ではDBごとに最初の接続でのみ設定する
+_wal_enabled_paths = set()
+_wal_lock = threading.Lock()
+
 
 @contextmanager
-def get_connection():
-    """データベース接続を取得するコンテキストマネージャ"""
-    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT)
+def get_connection(check_same_thread: bool = True):
+    """
+    データベース接続を取得するコンテキストマネージャ
+
+    check_same_thread=False は、呼び出し側で排他制御した上で
+    複数スレッドから1本の接続を使う場合のみ指定する。
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     # WALモードで読み書きの並行性を向上
-    conn.execute("PRAGMA journal_mode=WAL")
+    with _wal_lock:
+        if DB_PATH not in _wal_enabled_paths:
+            conn.execute("PRAGMA journal_mode=WAL")
+            _wal_enabled_paths.add(DB_PATH)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     try:
         yield conn
     finally:
@@ -0,0 +1,72 @@
+"""
+HTTPセッションユーティリティモジュール
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# コネクションプールのサイズ（並列取得のスレッド数より大きくする）
+POOL_SIZE = 16
+
+# レスポンスキャッシュの有効期間（秒）
+CACHE_EXPIRE_AFTER = 3600
+
+
+def create_session(cache_path: Optional[Path] = None, retries: int = 0) -> requests.Session:
+    """
+    keep-alive・コネクションプール付きのセッションを作成
+
+    cache_path を指定し、requests-cache がインストールされている場合は
+    GETのレスポンスをSQLiteにキャッシュする（Cache-Control / ETag にも従う）。
+    retries を指定すると 502/503/504 を接続層で自動リトライする。接続層のリトライは
+    呼び出し側のレート制限を通らないため、レート制限付きで取得する場合は指定せず、
+    呼び出し側のリトライで1回ごとに待機すること。
+    """
+    if cache_path is not None and requests_cache is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        session = requests_cache.CachedSession(
+            str(cache_path),
+            backend="sqlite",
+            expire_after=CACHE_EXPIRE_AFTER,
+            cache_control=True,
+            allowable_methods=("GET",),
+        )
+        # 期限切れのレスポンスは再利用されないため、起動時に削除してファイルの肥大化を防ぐ
+        session.cache.delete(expired=True)
+    else:
+        session = requests.Session()
+
+    if retries:
+        max_retries = Retry(total=retries, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    else:
+        max_retries = 0
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=max_retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_cached(session: requests.Session, url: str, **kwargs) -> Optional[requests.Response]:
+    """キャッシュ済み（期限内）のレスポンスを返す。キャッシュがなければ通信せずに None を返す"""
+    if requests_cache is None or not isinstance(session, requests_cache.CachedSession):
+        return None
+    response = session.get(url, only_if_cached=True, **kwargs)
+    # キャッシュにない場合は 504 Gateway Timeout が返る
+    if response.status_code == 504:
+        return None
+    return response
+
+
+def clear_cache(session: requests.Session) -> None:
+    """セッションのレスポンスキャッシュを全削除（キャッシュなしのセッションでは何もしない）"""
+    if requests_cache is not None and isinstance(session, requests_cache.CachedSession):
+        session.cache.clear()
@@ -0,0 +1,21 @@
+"""
+JSONパースユーティリティモジュール
+
+orjson がインストールされていれば使用し、なければ標準の json にフォールバックする。
+どちらの場合もパース失敗時は json.JSONDecodeError（のサブクラス）が送出される。
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """JSON文字列（bytes/str）をパースする"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
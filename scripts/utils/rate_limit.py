@@ -0,0 +1,47 @@
+"""
+APIレート制限ユーティリティモジュール
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """スレッド間で共有できるレート制限（1秒あたりのリクエスト数を制限）"""
+
+    def __init__(self, rate_per_sec: float, jitter: float = 0.0):
+        self.interval = 1.0 / rate_per_sec
+        # 各間隔を ±jitter 秒の範囲でランダムに揺らす（平均は interval のまま）
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def acquire(self):
+        """次のリクエストが許可されるまで待機"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            # 次の枠を予約してからロックを外し、待機中も他スレッドが予約できるようにする
+            interval = self.interval + random.uniform(-self.jitter, self.jitter)
+            self._next_time = max(now, self._next_time) + interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AsyncRateLimiter:
+    """asyncio のコルーチン間で共有するレート制限（1秒あたりのリクエスト数を制限）"""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec
+        self._next_time = time.monotonic()
+
+    async def acquire(self):
+        """次のリクエストが許可されるまで待機"""
+        # 枠の予約は await を挟まずに行うため、コルーチン間でロックは不要
+        now = time.monotonic()
+        wait = self._next_time - now
+        self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)